@@ -18,6 +18,22 @@ YEAR_CHANNEL_PREFIX_MAP = {
     "4nd_years": "4th"  
 }
 
+TEAM_KEYS = frozenset(TEAM_CATEGORY_MAP)
+YEAR_KEYS = frozenset(YEAR_CHANNEL_PREFIX_MAP)
+
+# guild_id -> {category name: CategoryChannel}
+_category_by_guild = {}
+# category_id -> {channel name: channel}
+_channel_by_category = {}
+
+def invalidate_channel_cache(channel: discord.abc.GuildChannel):
+    """Drop cached lookups affected by a channel being created, edited or deleted."""
+    _category_by_guild.pop(channel.guild.id, None)
+    _channel_by_category.pop(channel.id, None)
+    category_id = getattr(channel, "category_id", None)
+    if category_id is not None:
+        _channel_by_category.pop(category_id, None)
+
 # async def get_user_status_channel(guild: discord.Guild, user_roles: list[discord.Role]) -> Optional[discord.TextChannel]:
 #     """
 #     Finds the correct status channel by matching a user's team role to a category
@@ -56,27 +72,31 @@ YEAR_CHANNEL_PREFIX_MAP = {
     
 #     return target_channel
 async def get_user_status_channel(guild: discord.Guild, user_roles: list[discord.Role]) -> Optional[discord.TextChannel]:
-    team_role_name = None
-    year_role_name = None
-
-    for role in user_roles:
-        if role.name in TEAM_CATEGORY_MAP:
-            team_role_name = role.name
-        if role.name in YEAR_CHANNEL_PREFIX_MAP:
-            year_role_name = role.name
+    # The last matching role wins, as it always has; set order would vary between runs
+    team_role_name = next((role.name for role in reversed(user_roles) if role.name in TEAM_KEYS), None)
+    year_role_name = next((role.name for role in reversed(user_roles) if role.name in YEAR_KEYS), None)
 
     if not team_role_name or not year_role_name:
         return None
 
     category_name = TEAM_CATEGORY_MAP[team_role_name]
     channel_prefix = YEAR_CHANNEL_PREFIX_MAP[year_role_name]
-    category = discord.utils.get(guild.categories, name=category_name)
+    categories = _category_by_guild.get(guild.id)
+    if categories is None:
+        categories = {c.name: c for c in reversed(guild.categories)}
+        _category_by_guild[guild.id] = categories
+    category = categories.get(category_name)
 
     if not category:
         return None
 
+    channels = _channel_by_category.get(category.id)
+    if channels is None:
+        channels = {c.name: c for c in reversed(category.channels)}
+        _channel_by_category[category.id] = channels
+
     expected_channel_name = f"{channel_prefix}-year-status-updates"
-    channel = discord.utils.get(category.channels, name=expected_channel_name)
+    channel = channels.get(expected_channel_name)
 
     # ✅ Auto-create if missing
     if not channel:
@@ -85,5 +105,6 @@ async def get_user_status_channel(guild: discord.Guild, user_roles: list[discord
             category=category,
             topic=f"Status updates for {channel_prefix}-year members of {team_role_name}"
         )
+        channels[expected_channel_name] = channel
 
     return channel
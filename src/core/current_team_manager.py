@@ -1,11 +1,13 @@
 import discord
-import json
-import os
-from typing import Set, List, Optional
+import asyncio
+import time
+from typing import Set, FrozenSet, List, Optional
 from datetime import datetime, timedelta
+from .utils import load_json, save_json, has_current_team_role, CURRENT_TEAM_ROLE
 
 CURRENT_TEAM_CACHE_FILE = "data/current_team_cache.json"
-CURRENT_TEAM_ROLE_NAME = "current-team"  
+CURRENT_TEAM_ROLE_NAME = CURRENT_TEAM_ROLE
+SAVE_DELAY_SECONDS = 0.5  # Coalesce cache writes made within this window
 
 class CurrentTeamManager:
     """
@@ -14,46 +16,75 @@ class CurrentTeamManager:
     """
     
     def __init__(self):
-        self._cache = {}  # guild_id -> {user_ids: set, last_updated: datetime}
+        self._cache = {}  # guild_id -> {user_ids: frozenset, last_updated: datetime, expires_at: monotonic seconds}
         self._cache_duration = timedelta(minutes=30)  # Cache for 30 minutes
+        self._save_pending = False
+        self._save_task = None
         self.load_cache()
     
     def load_cache(self):
         """Load cached current-team members from file."""
-        if os.path.exists(CURRENT_TEAM_CACHE_FILE):
-            try:
-                with open(CURRENT_TEAM_CACHE_FILE, "r") as f:
-                    data = json.load(f)
-                    for guild_id, cache_data in data.items():
-                        self._cache[int(guild_id)] = {
-                            "user_ids": set(cache_data["user_ids"]),
-                            "last_updated": datetime.fromisoformat(cache_data["last_updated"])
-                        }
-            except Exception as e:
-                print(f"Error loading current-team cache: {e}")
-                self._cache = {}
-    
-    def save_cache(self):
-        """Save current-team cache to file."""
         try:
-            os.makedirs(os.path.dirname(CURRENT_TEAM_CACHE_FILE), exist_ok=True)
-            data = {}
-            for guild_id, cache_data in self._cache.items():
-                data[str(guild_id)] = {
-                    "user_ids": list(cache_data["user_ids"]),
-                    "last_updated": cache_data["last_updated"].isoformat()
+            data = load_json(CURRENT_TEAM_CACHE_FILE, {})
+            for guild_id, cache_data in data.items():
+                last_updated = datetime.fromisoformat(cache_data["last_updated"])
+                remaining = self._cache_duration - (datetime.now() - last_updated)
+                self._cache[int(guild_id)] = {
+                    "user_ids": frozenset(cache_data["user_ids"]),
+                    "last_updated": last_updated,
+                    "expires_at": time.monotonic() + remaining.total_seconds()
                 }
-            with open(CURRENT_TEAM_CACHE_FILE, "w") as f:
-                json.dump(data, f, indent=2)
+        except Exception as e:
+            print(f"Error loading current-team cache: {e}")
+            self._cache = {}
+    
+    def _serialize_cache(self) -> dict:
+        """Snapshot the cache into a JSON-serializable dict."""
+        data = {}
+        for guild_id, cache_data in self._cache.items():
+            data[str(guild_id)] = {
+                "user_ids": list(cache_data["user_ids"]),
+                "last_updated": cache_data["last_updated"].isoformat()
+            }
+        return data
+    
+    def _write_cache(self, data: dict):
+        try:
+            save_json(CURRENT_TEAM_CACHE_FILE, data, indent=None)
         except Exception as e:
             print(f"Error saving current-team cache: {e}")
     
+    def save_cache(self):
+        """Save current-team cache to file."""
+        self._write_cache(self._serialize_cache())
+    
+    def schedule_save(self):
+        """
+        Save the cache in the background, coalescing changes made in quick succession.
+        Falls back to a synchronous save when no event loop is running.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save_cache()
+            return
+        
+        self._save_pending = True
+        if self._save_task is None or self._save_task.done():
+            self._save_task = loop.create_task(self._background_save())
+    
+    async def _background_save(self):
+        while self._save_pending:
+            await asyncio.sleep(SAVE_DELAY_SECONDS)
+            self._save_pending = False
+            # Snapshot on the event loop, write the file on a worker thread
+            data = self._serialize_cache()
+            await asyncio.to_thread(self._write_cache, data)
+    
     def _is_cache_valid(self, guild_id: int) -> bool:
         """Check if cache is still valid for a guild."""
-        if guild_id not in self._cache:
-            return False
-        last_updated = self._cache[guild_id]["last_updated"]
-        return datetime.now() - last_updated < self._cache_duration
+        entry = self._cache.get(guild_id)
+        return entry is not None and time.monotonic() < entry["expires_at"]
     
     def _update_cache(self, guild: discord.Guild) -> Set[int]:
         """Update cache for a specific guild."""
@@ -66,19 +97,20 @@ class CurrentTeamManager:
                 current_team_ids.add(member.id)
         
         self._cache[guild.id] = {
-            "user_ids": current_team_ids,
-            "last_updated": datetime.now()
+            "user_ids": frozenset(current_team_ids),
+            "last_updated": datetime.now(),
+            "expires_at": time.monotonic() + self._cache_duration.total_seconds()
         }
         
-        # Save to file asynchronously (or you can make this async)
-        self.save_cache()
+        # Save to file asynchronously
+        self.schedule_save()
         
         print(f"Updated current-team cache for {guild.name}: {len(current_team_ids)} members")
         return current_team_ids
     
     def _has_current_team_role(self, roles: List[discord.Role]) -> bool:
         """Check if roles contain current-team role."""
-        return any(role.name.lower() == CURRENT_TEAM_ROLE_NAME.lower() for role in roles)
+        return has_current_team_role(roles)
     
     def is_current_team_member(self, member: discord.Member) -> bool:
         """
@@ -98,6 +130,15 @@ class CurrentTeamManager:
         current_team_ids = self._update_cache(member.guild)
         return member.id in current_team_ids
     
+    def member_ids(self, guild: discord.Guild) -> FrozenSet[int]:
+        """
+        Get the ids of a guild's current-team members, refreshing the cache if it expired.
+        Cheaper than is_current_team_member() for gating interactions on a set lookup.
+        """
+        if not self._is_cache_valid(guild.id):
+            self._update_cache(guild)
+        return self._cache[guild.id]["user_ids"]
+    
     def get_current_team_members(self, guild: discord.Guild, force_refresh: bool = False) -> List[discord.Member]:
         """
         Get all current-team members for a guild.
@@ -109,15 +150,10 @@ class CurrentTeamManager:
         if force_refresh or not self._is_cache_valid(guild_id):
             self._update_cache(guild)
         
-        current_team_ids = self._cache.get(guild_id, {}).get("user_ids", set())
+        current_team_ids = self._cache.get(guild_id, {}).get("user_ids", frozenset())
         
         # Convert IDs back to Member objects
-        current_team_members = []
-        for member in guild.members:
-            if member.id in current_team_ids:
-                current_team_members.append(member)
-        
-        return current_team_members
+        return [member for user_id in current_team_ids if (member := guild.get_member(user_id)) is not None]
     
     def get_current_team_count(self, guild: discord.Guild) -> int:
         """Get count of current-team members."""
@@ -133,14 +169,14 @@ class CurrentTeamManager:
     def remove_member_from_cache(self, guild_id: int, user_id: int):
         """Remove a specific member from cache (useful for immediate updates)."""
         if guild_id in self._cache:
-            self._cache[guild_id]["user_ids"].discard(user_id)
-            self.save_cache()
+            self._cache[guild_id]["user_ids"] -= {user_id}
+            self.schedule_save()
     
     def add_member_to_cache(self, guild_id: int, user_id: int):
         """Add a specific member to cache (useful for immediate updates)."""
         if guild_id in self._cache:
-            self._cache[guild_id]["user_ids"].add(user_id)
-            self.save_cache()
+            self._cache[guild_id]["user_ids"] |= {user_id}
+            self.schedule_save()
 
 # Global instance
 current_team_manager = CurrentTeamManager()
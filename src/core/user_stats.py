@@ -1,42 +1,201 @@
-import json
+import asyncio
 import os
 import datetime 
 import uuid
+from bisect import bisect_left, bisect_right
+from .utils import load_json, save_json, encode_json, write_json, json_generation, has_current_team_role
 
 
 DATA_FILE = os.path.join("data", "users.json")
 PENDING_FILE = os.path.join("data", "pending.json")
+CASUAL_LEAVE_FILE = os.path.join("data", "casual_leave.json")
 
-def has_current_team_role(user_roles):
-    """Check if user has the 'current-team' role."""
-    role_names = [role.name.lower() for role in user_roles]
-    return "current-team" in role_names
+# Leave request statuses as stored in pending.json
+STATUS_PENDING = "pending"
+STATUS_AUTO_APPROVED = "auto-approved"
+STATUS_APPROVED = "approved"
+STATUS_DENIED = "denied"
+APPROVED_STATUSES = frozenset({STATUS_APPROVED, STATUS_AUTO_APPROVED})
+
+PENDING_SAVE_DELAY_SECONDS = 0.1  # Coalesce pending.json writes made within this window
+PENDING_RETRY_DELAY_SECONDS = 5  # Wait before retrying a pending.json write that failed
+_pending_writer = {"data": None, "dirty": False, "task": None}
+_pending_index = {"key": None, "by_id": {}}
+
+def parse_date(date_str):
+    """
+    Parse a stored DD-MM-YYYY date. Splitting by hand is several times faster than
+    strptime, which matters in loops over every submission or leave; raises ValueError like strptime.
+    """
+    day, month, year = date_str.split("-")
+    return datetime.date(int(year), int(month), int(day))
+
+def iso_date(date_str):
+    """
+    Reorder a stored DD-MM-YYYY date as YYYY-MM-DD. ISO strings compare in date order,
+    so range checks against date.isoformat() need no parsing at all.
+    """
+    return f"{date_str[6:10]}-{date_str[3:5]}-{date_str[:2]}"
+
+def _build_by_date(user_data):
+    """Index a user's submission ids by their DD-MM-YYYY date."""
+    by_date = {}
+    for sub_id, submission in user_data.get("submissions", {}).items():
+        by_date.setdefault(submission["date"], []).append(sub_id)
+    return by_date
+
+def month_key(date_str):
+    """Return the "YYYY-MM" bucket a DD-MM-YYYY date string falls in."""
+    return f"{date_str[6:10]}-{date_str[3:5]}"
+
+def _month_keys(from_date, to_date):
+    """The "YYYY-MM" buckets of every month from from_date to to_date, inclusive."""
+    year, month = from_date.year, from_date.month
+    keys = []
+    while (year, month) <= (to_date.year, to_date.month):
+        keys.append(f"{year:04d}-{month:02d}")
+        if month == 12:
+            year, month = year + 1, 1
+        else:
+            month += 1
+    return keys
+
+def week_key(date):
+    """Return the "YYYY-Www" ISO week (Monday to Sunday) a date falls in."""
+    iso_year, iso_week, _ = date.isocalendar()
+    return f"{iso_year}-W{iso_week:02d}"
+
+def _build_weekly_totals(user_data):
+    """Sum a user's submitted hours per ISO week."""
+    weekly_totals = {}
+    for submission in user_data.get("submissions", {}).values():
+        if "date_ord" in submission:
+            key = week_key(datetime.date.fromordinal(submission["date_ord"]))
+            weekly_totals[key] = weekly_totals.get(key, 0.0) + submission["hours"]
+    return weekly_totals
+
+def _build_by_month(user_data):
+    """Index a user's submission ids by the "YYYY-MM" month of their date."""
+    by_month = {}
+    for sub_id, submission in user_data.get("submissions", {}).items():
+        by_month.setdefault(month_key(submission["date"]), []).append(sub_id)
+    return by_month
+
+def _build_leave_by_month(leaves):
+    """Index a user's casual leaves (by list position) by the "YYYY-MM" month they start in."""
+    by_month = {}
+    for position, leave in enumerate(leaves):
+        by_month.setdefault(month_key(leave["start"]), []).append(position)
+    return by_month
+
+def _migrate_user_data(data):
+    """
+    Rebuild the derived fields of users.json from the submissions themselves, so files
+    written by older versions or edited by hand never leave stale or dangling indexes.
+    """
+    for user_data in data.values():
+        for submission in user_data.get("submissions", {}).values():
+            try:
+                submission["date_ord"] = parse_date(submission["date"]).toordinal()
+            except ValueError:
+                submission.pop("date_ord", None)
+        user_data["by_date"] = _build_by_date(user_data)
+        user_data["by_month"] = _build_by_month(user_data)
+        user_data["weekly_totals"] = _build_weekly_totals(user_data)
+
+def _migrate_casual_leave_data(data):
+    """
+    Rebuild the derived fields of casual_leave.json from the leaves themselves. Admins edit
+    this file by hand (e.g. to grant bonus_days), so stored positions can't be trusted.
+    """
+    for user_leaves in data.values():
+        leaves = user_leaves.get("leaves", [])
+        for leave in leaves:
+            leave["start_iso"] = iso_date(leave["start"])
+            leave["end_iso"] = iso_date(leave["end"])
+        user_leaves["by_month"] = _build_leave_by_month(leaves)
 
 def load_user_data():
     """Loads user data from the users.json file."""
-    if not os.path.exists(DATA_FILE):
-        return {}
-    with open(DATA_FILE, "r") as f:
-        return json.load(f)
+    return load_json(DATA_FILE, {}, migrate=_migrate_user_data)
 
 def save_user_data(data):
     """Saves user data to the users.json file."""
-    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+    save_json(DATA_FILE, data, indent=4)
 
 def load_pending_requests():
     """Loads pending requests from pending.json."""
-    if not os.path.exists(PENDING_FILE):
-        return []
-    with open(PENDING_FILE, "r") as f:
-        return json.load(f)
+    task = _pending_writer["task"]
+    if task is not None and not task.done():
+        # A background save is still queued, and its list is newer than the file
+        return _pending_writer["data"]
+    return load_json(PENDING_FILE, [])
 
 def save_pending_requests(data):
     """Saves pending requests to pending.json."""
-    os.makedirs(os.path.dirname(PENDING_FILE), exist_ok=True)
-    with open(PENDING_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+    task = _pending_writer["task"]
+    if task is not None and not task.done():
+        # A background write may still land after a direct one; queue behind it instead
+        schedule_save_pending_requests(data)
+        return
+    save_json(PENDING_FILE, data, indent=4)
+
+def schedule_save_pending_requests(data):
+    """
+    Save pending requests in the background, coalescing saves made in quick succession.
+    Until the write lands, load_pending_requests() keeps returning the updated in-memory list.
+    Falls back to a synchronous save when no event loop is running.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        save_pending_requests(data)
+        return
+    
+    _pending_writer["data"] = data
+    _pending_writer["dirty"] = True
+    task = _pending_writer["task"]
+    if task is None or task.done():
+        _pending_writer["task"] = loop.create_task(_flush_pending_requests())
+
+async def _flush_pending_requests():
+    while _pending_writer["dirty"]:
+        await asyncio.sleep(PENDING_SAVE_DELAY_SECONDS)
+        _pending_writer["dirty"] = False
+        data = _pending_writer["data"]
+        # Encode on the event loop so the list can't change mid-dump, write on a worker thread
+        payload = encode_json(data, indent=4)
+        try:
+            await asyncio.to_thread(write_json, PENDING_FILE, data, payload)
+        except Exception as e:
+            # Keep the list queued: load_pending_requests() serves it from memory until a write lands
+            print(f"Error saving pending requests, retrying in {PENDING_RETRY_DELAY_SECONDS}s: {e}")
+            _pending_writer["dirty"] = True
+            await asyncio.sleep(PENDING_RETRY_DELAY_SECONDS)
+
+def validate_pending_requests():
+    """
+    Check pending.json once at startup, so the request handlers can trust it holds a list.
+    A file with any other top-level value is reset to an empty list; one that is not
+    valid JSON raises, and the bot should not start until it is repaired.
+    """
+    requests = load_json(PENDING_FILE, [])
+    if not isinstance(requests, list):
+        print(f"{PENDING_FILE} does not contain a list of requests; resetting it")
+        save_json(PENDING_FILE, [], indent=4)
+
+def append_pending_request(request_data):
+    """
+    Add a new leave request to pending.json. Requests submitted in quick succession
+    are written together by one background save instead of one rewrite each.
+    """
+    requests = load_pending_requests()
+    requests.append(request_data)
+    schedule_save_pending_requests(requests)
+
+def load_casual_leave_data():
+    """Loads casual leave history from casual_leave.json."""
+    return load_json(CASUAL_LEAVE_FILE, {}, migrate=_migrate_casual_leave_data)
 
 def record_status_update(user_id, username, date, hours, description, blockers, is_wfh, is_late=False):
     """
@@ -48,25 +207,27 @@ def record_status_update(user_id, username, date, hours, description, blockers,
     
     # Ensure date is in correct format
     if isinstance(date, datetime.date):
-        date_str = date.strftime("%d-%m-%Y")
+        parsed_date = date
     else:
         # If it's already a string, validate the format
         try:
             # Try to parse and reformat to ensure consistency
             parsed_date = datetime.datetime.strptime(str(date), "%d-%m-%Y").date()
-            date_str = parsed_date.strftime("%d-%m-%Y")
         except ValueError:
             try:
                 # Try parsing YYYY-MM-DD format and convert to DD-MM-YYYY
                 parsed_date = datetime.datetime.strptime(str(date), "%Y-%m-%d").date()
-                date_str = parsed_date.strftime("%d-%m-%Y")
             except ValueError:
                 raise ValueError(f"Invalid date format: {date}. Expected DD-MM-YYYY format.")
+    date_str = parsed_date.strftime("%d-%m-%Y")
 
     if user_id_str not in data:
         data[user_id_str] = {
             "username": username,
             "submissions": {},
+            "by_date": {},
+            "by_month": {},
+            "weekly_totals": {},
             "total_hours": 0.0,
             "total_submissions": 0,
             "late_submissions": 0
@@ -78,6 +239,7 @@ def record_status_update(user_id, username, date, hours, description, blockers,
     submission_id = str(uuid.uuid4())
     submission_data = {
         "date": date_str,
+        "date_ord": parsed_date.toordinal(),
         "hours": hours,
         "description": description,
         "blockers": blockers,
@@ -86,27 +248,33 @@ def record_status_update(user_id, username, date, hours, description, blockers,
         "timestamp": datetime.datetime.now().isoformat()
     }
     
+    # Lets derived views (e.g. the CSV export) tell which users changed since they last looked
+    data[user_id_str]["updated_at"] = submission_data["timestamp"]
+    
     # Check if this date already has a submission (override case)
-    existing_submission = None
-    for sub_id, sub_data in data[user_id_str]["submissions"].items():
-        if sub_data["date"] == date_str:
-            existing_submission = sub_id
-            break
+    existing = data[user_id_str]["by_date"].get(date_str)
+    existing_submission = existing[0] if existing else None
     
     if existing_submission:
         # Remove old hours from total before adding new ones
         old_hours = data[user_id_str]["submissions"][existing_submission]["hours"]
         data[user_id_str]["total_hours"] -= old_hours
+        data[user_id_str]["weekly_totals"][week_key(parsed_date)] -= old_hours
         data[user_id_str]["submissions"][existing_submission] = submission_data
     else:
         # New submission
         data[user_id_str]["submissions"][submission_id] = submission_data
+        data[user_id_str]["by_date"].setdefault(date_str, []).append(submission_id)
+        data[user_id_str]["by_month"].setdefault(month_key(date_str), []).append(submission_id)
         data[user_id_str]["total_submissions"] += 1
         if is_late:
             data[user_id_str]["late_submissions"] += 1
     
     # Update total hours
     data[user_id_str]["total_hours"] += hours
+    weekly_totals = data[user_id_str]["weekly_totals"]
+    week = week_key(parsed_date)
+    weekly_totals[week] = weekly_totals.get(week, 0.0) + hours
 
     save_user_data(data)
 
@@ -114,30 +282,65 @@ def get_users_without_submission_for_date(guild_members, date):
     """Get list of current-team users who haven't submitted status for a specific date."""
     data = load_user_data()
     date_str = date.strftime("%d-%m-%Y")
-    non_submitters = []
+    submitter_ids = {int(user_id_str) for user_id_str, user_data in data.items() if date_str in user_data["by_date"]}
     
-    for member in guild_members:
-        if member.bot:
+    return [
+        member for member in guild_members
+        if not member.bot and member.id not in submitter_ids and has_current_team_role(member.roles)
+    ]
+
+def get_submissions_by_users_for_date(user_ids, date):
+    """
+    Return the ids of users who submitted a status update for date.
+    Pass user_ids to only consider those users, or None for everyone.
+    """
+    data = load_user_data()
+    date_str = date.strftime("%d-%m-%Y")
+    
+    if user_ids is None:
+        return {int(user_id_str) for user_id_str, user_data in data.items() if date_str in user_data["by_date"]}
+    
+    submitted_ids = set()
+    for user_id in user_ids:
+        user_data = data.get(str(user_id))
+        if user_data is not None and date_str in user_data["by_date"]:
+            submitted_ids.add(user_id)
+    return submitted_ids
+
+def get_leaves_by_users_for_date(user_ids, date):
+    """
+    Return the ids of users on approved or casual leave on date.
+    Pass user_ids to only consider those users, or None for everyone.
+    """
+    wanted = None if user_ids is None else set(user_ids)
+    leave_ids = set()
+    day = date.isoformat()
+    
+    for request in load_pending_requests():
+        if request.get("status") not in APPROVED_STATUSES:
             continue
-        
-        # Only check current-team members
-        if not has_current_team_role(member.roles):
+        if wanted is not None and request.get("member_id") not in wanted:
             continue
-            
-        user_id_str = str(member.id)
-        has_submission = False
-        
-        if user_id_str in data:
-            submissions = data[user_id_str].get("submissions", {})
-            for submission in submissions.values():
-                if submission["date"] == date_str:
-                    has_submission = True
+        try:
+            if iso_date(request["dates"]["start"]) <= day <= iso_date(request["dates"]["end"]):
+                leave_ids.add(request["member_id"])
+        except KeyError:
+            continue
+    
+    casual_data = load_casual_leave_data()
+    for user_id_str, user_leaves in casual_data.items():
+        user_id = int(user_id_str)
+        if wanted is not None and user_id not in wanted:
+            continue
+        for leave in user_leaves.get("leaves", []):
+            try:
+                if leave["start_iso"] <= day <= leave["end_iso"]:
+                    leave_ids.add(user_id)
                     break
-        
-        if not has_submission:
-            non_submitters.append(member)
+            except KeyError:
+                continue
     
-    return non_submitters
+    return leave_ids
 
 def get_user_submissions_for_date(user_id, date):
     """Get all submissions for a specific date."""
@@ -148,51 +351,49 @@ def get_user_submissions_for_date(user_id, date):
     if user_id_str not in data:
         return []
     
-    submissions = []
-    for submission in data[user_id_str].get("submissions", {}).values():
-        if submission["date"] == date_str:
-            submissions.append(submission)
-    
-    return submissions
+    user_data = data[user_id_str]
+    submissions = user_data.get("submissions", {})
+    return [submissions[sub_id] for sub_id in user_data["by_date"].get(date_str, [])]
 
-def get_weekly_stats(user_id, week_start_date):
-    """Get weekly statistics for a user."""
-    data = load_user_data()
-    user_id_str = str(user_id)
-    
-    if user_id_str not in data:
-        return {
-            "total_hours": 0.0,
-            "submissions_count": 0,
-            "target_met": False,
-            "daily_breakdown": [],
-            "remaining_hours": 32.0
-        }
-    
-    # Calculate week end date (Sunday)
-    week_end_date = week_start_date + datetime.timedelta(days=6)
-    
+def _empty_weekly_stats():
+    return {
+        "total_hours": 0.0,
+        "submissions_count": 0,
+        "target_met": False,
+        "daily_breakdown": [],
+        "remaining_hours": 32.0
+    }
+
+def _week_days(week_start_date):
+    """Return (date_str, day_name) for the 7 days starting at week_start_date."""
+    days = []
+    for i in range(7):
+        current_date = week_start_date + datetime.timedelta(days=i)
+        days.append((current_date.strftime("%d-%m-%Y"), current_date.strftime("%A")))
+    return days
+
+def _weekly_stats_for_user(user_data, week_days):
+    """Compute weekly statistics for one user's record over precomputed week days."""
     weekly_hours = 0.0
     submissions_count = 0
     daily_breakdown = []
     
+    submissions = user_data.get("submissions", {})
+    by_date = user_data["by_date"]
+    
     # Check each day of the week
-    for i in range(7):
-        current_date = week_start_date + datetime.timedelta(days=i)
-        date_str = current_date.strftime("%d-%m-%Y")
+    for date_str, day_name in week_days:
         day_hours = 0.0
         
-        submissions = data[user_id_str].get("submissions", {})
-        for submission in submissions.values():
-            if submission["date"] == date_str:
-                day_hours += submission["hours"]
-                submissions_count += 1
+        for sub_id in by_date.get(date_str, []):
+            day_hours += submissions[sub_id]["hours"]
+            submissions_count += 1
         
         weekly_hours += day_hours
         daily_breakdown.append({
             "date": date_str,
             "hours": day_hours,
-            "day_name": current_date.strftime("%A")
+            "day_name": day_name
         })
     
     return {
@@ -203,6 +404,33 @@ def get_weekly_stats(user_id, week_start_date):
         "remaining_hours": max(0, 32.0 - weekly_hours)
     }
 
+def get_weekly_stats(user_id, week_start_date):
+    """Get weekly statistics for a user."""
+    data = load_user_data()
+    user_id_str = str(user_id)
+    
+    if user_id_str not in data:
+        return _empty_weekly_stats()
+    
+    return _weekly_stats_for_user(data[user_id_str], _week_days(week_start_date))
+
+def get_weekly_stats_bulk(user_ids, week_start_date):
+    """
+    Get weekly statistics for many users at once.
+    Returns a dict mapping each user id to the same stats get_weekly_stats() returns.
+    """
+    data = load_user_data()
+    week_days = _week_days(week_start_date)
+    
+    stats_map = {}
+    for user_id in user_ids:
+        user_data = data.get(str(user_id))
+        if user_data is None:
+            stats_map[user_id] = _empty_weekly_stats()
+        else:
+            stats_map[user_id] = _weekly_stats_for_user(user_data, week_days)
+    return stats_map
+
 def get_monthly_stats(user_id, month, year):
     """Get monthly statistics for a user."""
     data = load_user_data()
@@ -216,24 +444,23 @@ def get_monthly_stats(user_id, month, year):
             "days_worked": 0
         }
     
+    user_data = data[user_id_str]
+    submissions = user_data.get("submissions", {})
     monthly_hours = 0.0
     monthly_submissions = 0
     late_submissions = 0
     days_worked = set()
     
-    submissions = data[user_id_str].get("submissions", {})
-    for submission in submissions.values():
-        try:
-            sub_date = datetime.datetime.strptime(submission["date"], "%d-%m-%Y").date()
-            if sub_date.month == month and sub_date.year == year:
-                monthly_hours += submission["hours"]
-                monthly_submissions += 1
-                days_worked.add(submission["date"])
-                
-                if submission.get("is_late", False):
-                    late_submissions += 1
-        except ValueError:
+    # Only the month's own submissions, found through the by_month index
+    for sub_id in user_data["by_month"].get(f"{year:04d}-{month:02d}", ()):
+        submission = submissions[sub_id]
+        if "date_ord" not in submission:
             continue
+        monthly_hours += submission["hours"]
+        monthly_submissions += 1
+        days_worked.add(submission["date_ord"])
+        if submission.get("is_late", False):
+            late_submissions += 1
     
     return {
         "total_hours": monthly_hours,
@@ -242,18 +469,52 @@ def get_monthly_stats(user_id, month, year):
         "days_worked": len(days_worked)
     }
 
+def _count_leaves_in_range(leaves, from_date, to_date):
+    """Count casual leaves (as returned by load_casual_leave_data) starting within [from_date, to_date]."""
+    first_day = from_date.isoformat()
+    last_day = to_date.isoformat()
+    return sum(1 for leave in leaves if first_day <= leave["start_iso"] <= last_day)
+
 def count_user_statistics_for_range(user_id, from_date, to_date):
     """Count statistics for a specific date range."""
     data = load_user_data()
     user_id_str = str(user_id)
     
     # Load casual leave data
-    casual_file = os.path.join("data", "casual_leave.json")
-    casual_data = {}
-    if os.path.exists(casual_file):
-        with open(casual_file, "r") as f:
-            casual_data = json.load(f)
+    casual_data = load_casual_leave_data()
+    
+    # Status updates and hours come from the user's date-sorted records, bisected to the range
+    records = build_user_submission_records(data[user_id_str]) if user_id_str in data else None
     
+    # Only the leaves starting in the range's months need checking
+    leaves = []
+    if user_id_str in casual_data:
+        user_leaves = casual_data[user_id_str]
+        all_leaves = user_leaves.get("leaves", [])
+        by_month = user_leaves["by_month"]
+        leaves = [all_leaves[position] for key in _month_keys(from_date, to_date) for position in by_month.get(key, ())]
+    
+    return count_user_statistics_from_records(records, leaves, from_date, to_date)
+
+def build_user_submission_records(user_data):
+    """
+    Index one user's submissions by date for range queries.
+    Returns (date_ords, records), where records are (date_ord, hours, is_late) tuples
+    sorted by date and date_ords holds just their ordinals for bisecting.
+    """
+    records = sorted(
+        (submission["date_ord"], submission["hours"], submission.get("is_late", False))
+        for submission in user_data.get("submissions", {}).values()
+        if "date_ord" in submission
+    )
+    return [record[0] for record in records], records
+
+def count_user_statistics_from_records(records, leaves, from_date, to_date):
+    """
+    Same as count_user_statistics_for_range, but for data the caller already holds:
+    records is the user's build_user_submission_records() result (or None) and leaves
+    their casual leave list.
+    """
     stats = {
         "total_status_updates": 0,
         "total_hours_worked": 0.0,
@@ -262,67 +523,65 @@ def count_user_statistics_for_range(user_id, from_date, to_date):
         "total_submissions": 0
     }
     
-    # Count status updates and hours within date range
-    if user_id_str in data:
-        submissions = data[user_id_str].get("submissions", {})
-        
-        for submission in submissions.values():
-            try:
-                sub_date = datetime.datetime.strptime(submission["date"], "%d-%m-%Y").date()
-                if from_date <= sub_date <= to_date:
-                    stats["total_status_updates"] += 1
-                    stats["total_submissions"] += 1
-                    stats["total_hours_worked"] += submission["hours"]
-                    
-                    if submission.get("is_late", False):
-                        stats["late_status_hours"] += submission["hours"]
-            except ValueError:
-                continue
+    if records is not None:
+        date_ords, sorted_records = records
+        lo = bisect_left(date_ords, from_date.toordinal())
+        hi = bisect_right(date_ords, to_date.toordinal())
+        for _, hours, is_late in sorted_records[lo:hi]:
+            stats["total_hours_worked"] += hours
+            if is_late:
+                stats["late_status_hours"] += hours
+        stats["total_status_updates"] = hi - lo
+        stats["total_submissions"] = hi - lo
     
-    # Count casual leaves within date range
-    if user_id_str in casual_data:
-        leaves = casual_data[user_id_str].get("leaves", [])
-        for leave in leaves:
-            try:
-                leave_start = datetime.datetime.strptime(leave["start"], "%d-%m-%Y").date()
-                if from_date <= leave_start <= to_date:
-                    stats["total_leaves"] += 1
-            except ValueError:
-                continue
+    if leaves:
+        stats["total_leaves"] = _count_leaves_in_range(leaves, from_date, to_date)
     
     return stats
 
+def _pending_request_index(requests):
+    """
+    Map request_id -> request for the pending list, rebuilt only when the list was
+    reloaded, saved, replaced or grown since the last lookup.
+    """
+    key = (json_generation(PENDING_FILE), id(requests), len(requests))
+    if _pending_index["key"] != key:
+        # reversed() so the first request wins if an id was ever stored twice
+        _pending_index["by_id"] = {request.get("request_id"): request for request in reversed(requests)}
+        _pending_index["key"] = key
+    return _pending_index["by_id"]
+
 def find_pending_request(request_id: str):
     """Finds a pending request by its unique ID."""
     requests = load_pending_requests()
-    for request in requests:
-        if request.get("request_id") == request_id:
-            return request
-    return None
+    return _pending_request_index(requests).get(request_id)
 
 def update_pending_request(request_id: str, status: str, approver_id: int):
     """Updates the status of a pending request and returns the updated request."""
     requests = load_pending_requests()
-    updated_request = None
-    for request in requests:
-        if request.get("request_id") == request_id:
-            request["status"] = status
-            request["approver_id"] = approver_id
-            request["updated_at"] = datetime.datetime.now().isoformat()
-            updated_request = request
-            break
-    
+    updated_request = _pending_request_index(requests).get(request_id)
     if updated_request:
-        save_pending_requests(requests)
+        updated_request["status"] = status
+        updated_request["approver_id"] = approver_id
+        updated_request["updated_at"] = datetime.datetime.now().isoformat()
+        schedule_save_pending_requests(requests)
     return updated_request
 
 def cleanup_old_pending_requests(days_old=30):
     """Remove pending requests older than specified days."""
     requests = load_pending_requests()
     cutoff_date = datetime.datetime.now() - datetime.timedelta(days=days_old)
+    cutoff_ts = cutoff_date.timestamp()
     
     cleaned_requests = []
     for request in requests:
+        created_ts = request.get("created_ts")
+        if created_ts is not None:
+            if created_ts > cutoff_ts:
+                cleaned_requests.append(request)
+            continue
+        
+        # Requests stored before created_ts was added only have the ISO string
         try:
             created_at = datetime.datetime.fromisoformat(request.get("created_at", ""))
             if created_at > cutoff_date:
@@ -331,5 +590,5 @@ def cleanup_old_pending_requests(days_old=30):
             # Keep requests with invalid dates for manual review
             cleaned_requests.append(request)
     
-    save_pending_requests(cleaned_requests)
+    schedule_save_pending_requests(cleaned_requests)
     return len(requests) - len(cleaned_requests)
\ No newline at end of file
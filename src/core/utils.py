@@ -1,10 +1,179 @@
+import contextlib
+import itertools
+import json
+import os
+import stat
+import tempfile
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+CURRENT_TEAM_ROLE = "current-team"
+
+# path -> ((mtime_ns, size), parsed data, generation, generation of the last parse from disk)
+_json_cache = {}
+_generations = itertools.count()
+# Directories already created or found by ensure_dir() in this process
+_ensured_dirs = set()
+
+
+def _file_signature(path):
+    file_stat = os.stat(path)
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+
+def _loads(raw):
+    """Parse JSON from bytes; both orjson and the stdlib accept bytes directly."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _dumps(data, indent):
+    """
+    Serialize data to bytes. orjson only supports two-space indentation.
+    NaN and infinity raise ValueError: orjson would silently write them as null.
+    """
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+        if b"null" in payload:
+            # Either a real None or a non-finite float; only the stdlib encoder can tell them apart
+            json.dumps(data, allow_nan=False)
+        return payload
+    return json.dumps(data, indent=indent, allow_nan=False).encode("utf-8")
+
+
+def load_json(path, default, migrate=None):
+    """
+    Load a JSON file, serving it from memory while it is unchanged on disk.
+    The returned object is shared between callers, so anything that mutates it
+    must persist the change with save_json(). If given, migrate(data) is run
+    once each time the file is actually parsed.
+    """
+    try:
+        signature = _file_signature(path)
+    except FileNotFoundError:
+        _json_cache.pop(path, None)
+        return default
+
+    cached = _json_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        _json_cache.pop(path, None)
+        return default
+    data = _loads(raw)
+    if migrate is not None:
+        migrate(data)
+    generation = next(_generations)
+    _json_cache[path] = (signature, data, generation, generation)
+    return data
+
+
+@contextlib.contextmanager
+def atomic_open(path, mode="wb", **kwargs):
+    """
+    Open a temp file next to path for writing and swap it in over path once the block
+    exits cleanly, so readers never see a partial file. Extra arguments go to open().
+    """
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with open(fd, mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file as 0600; keep the permissions the target file already had.
+        # os.chmod on the path, since os.fchmod is Unix-only before Python 3.13
+        try:
+            permissions = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            permissions = 0o644
+        os.chmod(tmp_path, permissions)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _atomic_write(path, payload):
+    """Write payload to a temp file next to path and swap it in, so readers never see a partial file."""
+    with atomic_open(path) as f:
+        f.write(payload)
+
+
+def ensure_dir(directory):
+    """Create directory if needed, touching the filesystem only the first time it is asked for."""
+    if directory not in _ensured_dirs:
+        os.makedirs(directory, exist_ok=True)
+        _ensured_dirs.add(directory)
+
+
+def encode_json(data, indent=4):
+    """Serialize data for write_json(), e.g. to snapshot it on the event loop before writing elsewhere."""
+    return _dumps(data, indent)
+
+
+def write_json(path, data, payload):
+    """Write payload, the encode_json() bytes of data, to a JSON file and refresh its cache entry."""
+    try:
+        ensure_dir(os.path.dirname(path))
+        _atomic_write(path, payload)
+    except BaseException:
+        # Callers mutate the cached object before saving; don't keep serving a change that never landed
+        _json_cache.pop(path, None)
+        raise
+    cached = _json_cache.get(path)
+    generation = next(_generations)
+    # Our own save isn't a re-read; only load_json() moves the parse generation
+    parsed = cached[3] if cached is not None and cached[1] is data else generation
+    _json_cache[path] = (_file_signature(path), data, generation, parsed)
+
+
+def save_json(path, data, indent=4):
+    """Write data to a JSON file and refresh its cache entry."""
+    try:
+        payload = encode_json(data, indent)
+    except BaseException:
+        _json_cache.pop(path, None)
+        raise
+    write_json(path, data, payload)
+
+
+def json_generation(path):
+    """
+    Return a token that changes whenever the cached contents of path are reloaded
+    or saved, for caching values derived from the last load_json() result.
+    """
+    cached = _json_cache.get(path)
+    return cached[2] if cached is not None else None
+
+
+def json_parse_generation(path):
+    """
+    Like json_generation(), but only changes when path is parsed from disk (e.g. after
+    a hand edit), not when this process saves the object load_json() returned.
+    """
+    cached = _json_cache.get(path)
+    return cached[3] if cached is not None else None
+
+
 def has_current_team_role(user_roles):
     """
     Check if user has the 'current-team' role.
     Only members with this role should be monitored by the bot.
     """
-    role_names = [role.name.lower() for role in user_roles]
-    return "current-team" in role_names
+    target = CURRENT_TEAM_ROLE
+    return any(role.name.lower() == target for role in user_roles)
 
 def validate_current_team_member(user_roles):
     """
@@ -13,4 +182,4 @@ def validate_current_team_member(user_roles):
     """
     if not has_current_team_role(user_roles):
         raise ValueError("This bot only monitors members with the 'current-team' role. Please contact an admin if you should have access.")
-    return True
\ No newline at end of file
+    return True
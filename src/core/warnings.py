@@ -1,83 +1,91 @@
 import discord
 import datetime
-import json
-import os
-from ..core.utils import has_current_team_role
+from ..core.utils import has_current_team_role, load_json, save_json
+from .user_stats import APPROVED_STATUSES, iso_date
 
 
 WARNINGS_FILE = "data/warnings.json"
 WARNING_CHANNEL_ID = 1416744851457704158
 
+# Core members and 4th years (high-level members) are exempt from warnings
+EXEMPT_ROLES = frozenset({"Core Member", "4th_years"})
+
+# guild_id -> (1st Probation role, 2nd Probation role)
+_probation_roles = {}
+# guild_id -> frozenset of the ids of the guild's EXEMPT_ROLES
+_exempt_role_ids = {}
+
+def _migrate_warnings(data):
+    """Convert flat "<user_id>-YYYY-MM": count entries to {user_id: {"YYYY-MM": count}}."""
+    for key in [key for key, value in data.items() if not isinstance(value, dict)]:
+        user_id_str, month_key = key.split("-", 1)
+        data.setdefault(user_id_str, {})[month_key] = data.pop(key)
+
 def load_warnings():
-    if not os.path.exists(WARNINGS_FILE):
-        return {}
-    with open(WARNINGS_FILE, "r") as f:
-        return json.load(f)
+    return load_json(WARNINGS_FILE, {}, migrate=_migrate_warnings)
 
 def save_warnings(data):
-    os.makedirs(os.path.dirname(WARNINGS_FILE), exist_ok=True)
-    with open(WARNINGS_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    save_json(WARNINGS_FILE, data, indent=2)
 
 def is_core_member_or_exempt(user_roles):
     """Check if user is core member or has roles that exempt them from warnings."""
-    role_names = [role.name for role in user_roles]
-    
-    # Core members are exempt from warnings
-    if "Core Member" in role_names:
-        return True
-    
-    # 4th years are also exempt (high-level members)
-    if "4th_years" in role_names:
-        return True
-        
-    return False
+    return not EXEMPT_ROLES.isdisjoint(role.name for role in user_roles)
+
+def _get_exempt_role_ids(guild: discord.Guild):
+    """Return the ids of the guild's exempt roles, resolving the names only once per guild."""
+    role_ids = _exempt_role_ids.get(guild.id)
+    if role_ids is None:
+        role_ids = frozenset(role.id for role in guild.roles if role.name in EXEMPT_ROLES)
+        _exempt_role_ids[guild.id] = role_ids
+    return role_ids
+
+def is_exempt_member(member: discord.Member):
+    """Same as is_core_member_or_exempt(member.roles), but compares cached role ids instead of names."""
+    return not _get_exempt_role_ids(member.guild).isdisjoint(role.id for role in member.roles)
 
 def user_has_leave_on_date(user_id, date):
     """Check if user has approved leave on the specified date."""
-    from .user_stats import load_pending_requests
+    from .user_stats import load_pending_requests, load_casual_leave_data
     
     # Load all requests (including approved ones)
     requests = load_pending_requests()
-    date_str = date.strftime("%d-%m-%Y")
+    casual_data = load_casual_leave_data()
+    
+    day = date.isoformat()
     
     for request in requests:
-        if request.get("member_id") == user_id and request.get("status") in ["approved", "auto-approved"]:
+        if request.get("member_id") == user_id and request.get("status") in APPROVED_STATUSES:
             try:
-                start_date_str = request["dates"]["start"]
-                end_date_str = request["dates"]["end"]
-                
-                start_date = datetime.datetime.strptime(start_date_str, "%d-%m-%Y").date()
-                end_date = datetime.datetime.strptime(end_date_str, "%d-%m-%Y").date()
-                
                 # Check if the date falls within the leave range
-                if start_date <= date <= end_date:
+                if iso_date(request["dates"]["start"]) <= day <= iso_date(request["dates"]["end"]):
                     return True
-            except (KeyError, ValueError):
+            except KeyError:
                 continue
     
     # Also check casual leave history
-    casual_file = os.path.join("data", "casual_leave.json")
-    if os.path.exists(casual_file):
-        with open(casual_file, "r") as f:
-            casual_data = json.load(f)
-        
-        user_id_str = str(user_id)
-        if user_id_str in casual_data:
-            for leave in casual_data[user_id_str].get("leaves", []):
-                try:
-                    start_date = datetime.datetime.strptime(leave["start"], "%d-%m-%Y").date()
-                    end_date = datetime.datetime.strptime(leave["end"], "%d-%m-%Y").date()
-                    
-                    if start_date <= date <= end_date:
-                        return True
-                except (KeyError, ValueError):
-                    continue
+    user_id_str = str(user_id)
+    if user_id_str in casual_data:
+        for leave in casual_data[user_id_str].get("leaves", []):
+            if leave["start_iso"] <= day <= leave["end_iso"]:
+                return True
     
     return False
 
-async def should_give_warning(member: discord.Member, date):
-    """Determine if a member should receive a warning for a specific date."""
+def build_date_index(date):
+    """
+    Build the lookup sets used by a warning sweep over many members.
+    Returns (leave_ids, submitted_ids): members on approved leave on the date and
+    members who already submitted a status update for it.
+    """
+    from .user_stats import get_leaves_by_users_for_date, get_submissions_by_users_for_date
+
+    return get_leaves_by_users_for_date(None, date), get_submissions_by_users_for_date(None, date)
+
+async def should_give_warning(member: discord.Member, date, index=None):
+    """
+    Determine if a member should receive a warning for a specific date.
+    Pass the result of build_date_index(date) as index when checking many members.
+    """
     
     # 1. Skip bots
     if member.bot:
@@ -88,7 +96,7 @@ async def should_give_warning(member: discord.Member, date):
         return False
 
     # 3. Check if user has roles that exempt them from warnings
-    if is_core_member_or_exempt(member.roles):
+    if is_exempt_member(member):
         return False
     
     # 3. Check if user has required roles (team + year)
@@ -100,6 +108,10 @@ async def should_give_warning(member: discord.Member, date):
         # Skip members without proper roles
         return False
     
+    if index is not None:
+        leave_ids, submitted_ids = index
+        return member.id not in leave_ids and member.id not in submitted_ids
+
     # 4. Check if user has approved leave on this date
     if user_has_leave_on_date(member.id, date):
         return False
@@ -113,14 +125,31 @@ async def should_give_warning(member: discord.Member, date):
     # If all checks pass, user should get a warning
     return True
 
+def _get_probation_roles(guild: discord.Guild):
+    """Return the guild's (1st Probation, 2nd Probation) roles, scanning guild.roles only once."""
+    roles = _probation_roles.get(guild.id)
+    if roles is None:
+        roles_by_name = {}
+        for role in guild.roles:
+            roles_by_name.setdefault(role.name, role)
+        roles = (roles_by_name.get("1st Probation"), roles_by_name.get("2nd Probation"))
+        _probation_roles[guild.id] = roles
+    return roles
+
+def invalidate_role_caches(guild_id: int):
+    """Forget cached probation and exempt roles after the guild's roles change."""
+    _probation_roles.pop(guild_id, None)
+    _exempt_role_ids.pop(guild_id, None)
+
 async def give_warning(bot, member: discord.Member):
     """Assign a warning to a member and check for probation escalation."""
     warnings = load_warnings()
     now = datetime.datetime.now()
-    month_key = f"{member.id}-{now.strftime('%Y-%m')}"  # user-month key
+    user_warnings = warnings.setdefault(str(member.id), {})
+    month_key = now.strftime('%Y-%m')
     
-    count = warnings.get(month_key, 0) + 1
-    warnings[month_key] = count
+    count = user_warnings.get(month_key, 0) + 1
+    user_warnings[month_key] = count
     save_warnings(warnings)
 
     # Post warning message in channel
@@ -130,8 +159,7 @@ async def give_warning(bot, member: discord.Member):
 
     # Probation escalation
     guild = member.guild
-    role_1st = discord.utils.get(guild.roles, name="1st Probation")
-    role_2nd = discord.utils.get(guild.roles, name="2nd Probation")
+    role_1st, role_2nd = _get_probation_roles(guild)
 
     if count == 3 and role_1st:
         await member.add_roles(role_1st)
@@ -155,8 +183,7 @@ def get_user_warning_count(user_id, month=None, year=None):
         month = month or now.month
         year = year or now.year
     
-    month_key = f"{user_id}-{year}-{month:02d}"
-    return warnings.get(month_key, 0)
+    return warnings.get(str(user_id), {}).get(f"{year}-{month:02d}", 0)
 
 def reset_monthly_warnings():
     """Reset warnings for the new month (can be called manually if needed)."""
@@ -165,9 +192,12 @@ def reset_monthly_warnings():
     
     # Keep only current month's warnings
     new_warnings = {}
-    for key, value in warnings.items():
-        if key.endswith(f"-{current_month}"):
-            new_warnings[key] = value
+    cleared = 0
+    for user_id_str, user_warnings in warnings.items():
+        cleared += len(user_warnings)
+        if current_month in user_warnings:
+            new_warnings[user_id_str] = {current_month: user_warnings[current_month]}
+            cleared -= 1
     
     save_warnings(new_warnings)
-    return len(warnings) - len(new_warnings)  # Return number of warnings cleared
\ No newline at end of file
+    return cleared  # Return number of warnings cleared
\ No newline at end of file
@@ -1,23 +1,31 @@
-from asyncio import tasks
+import asyncio
+import logging
+import logging.handlers
 import os
 import datetime
+import itertools
+from collections import defaultdict
+from pathlib import Path
 import discord
 from discord.ext import commands, tasks
 from dotenv import load_dotenv
-import csv
 
-from .core.user_stats import load_user_data, record_status_update, find_pending_request, get_users_without_submission_for_date
-from .core.warnings import give_warning,user_has_leave_on_date,should_give_warning,user_has_leave_on_date
-from .core.channel_lookup import get_user_status_channel
+from .core.user_stats import load_user_data, record_status_update, find_pending_request, validate_pending_requests, get_users_without_submission_for_date, get_leaves_by_users_for_date, get_weekly_stats, get_weekly_stats_bulk
+from .core.warnings import give_warning, should_give_warning, build_date_index, is_exempt_member, invalidate_role_caches
+from .core.channel_lookup import get_user_status_channel, invalidate_channel_cache
 from .core.current_team_manager import CurrentTeamManager
 from .core.current_team_manager import CURRENT_TEAM_ROLE_NAME
-from .core.user_stats import count_user_statistics_for_range,get_user_submissions_for_date
+from .core.user_stats import build_user_submission_records,count_user_statistics_from_records,load_casual_leave_data
 from .core.utils import has_current_team_role
-from .ui.buttons import LeaveApprovalView
-from .ui.forms import StatusForm, CasualLeaveModal, MedicalLeaveModal, SpecialLeaveModal, export_to_csv,validate_user_roles
+from .ui.buttons import LeaveActionButton, forget_channel
+from .ui.forms import StatusForm, CasualLeaveModal, MedicalLeaveModal, SpecialLeaveModal, export_to_csv,validate_user_roles, write_csv, invalidate_core_role_cache
 
 load_dotenv()
 
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+
+logger = logging.getLogger(__name__)
+
 TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 intents = discord.Intents.default()
 intents.messages = True
@@ -33,63 +41,76 @@ bot = commands.Bot(command_prefix="!", intents=intents)
 current_team_manager = CurrentTeamManager()
 
 # Define CSV export file path
-CSV_EXPORT_FILE = os.path.join("data", "activity_report.csv")
+CSV_EXPORT_DIR = Path("data")
+
+CURRENT_TEAM_ROLE_NAME_LOWER = CURRENT_TEAM_ROLE_NAME.lower()
+
+# Daily warning sweep: members checked per gather() batch, and at most this many in flight
+WARNING_BATCH_SIZE = 25
+WARNING_CONCURRENCY = 10
 
-def export_current_team_csv(guild, from_date=None, to_date=None):
+async def export_current_team_csv(guild, from_date=None, to_date=None):
     """
     Export CSV data for only current-team members.
-    Requires guild context to check member roles.
+    The rows are computed on the event loop, since users.json is shared with the handlers
+    that update it; only writing the file happens on a worker thread.
     """
     data = load_user_data()
-    csv_data = []
     
     if from_date is None:
         from_date = datetime.date(2020, 1, 1)
     if to_date is None:
         to_date = datetime.date.today()
     
+    from_date_str = from_date.strftime("%d-%m-%Y")
+    to_date_str = to_date.strftime("%d-%m-%Y")
+    
     # Get all current-team members using the manager
     current_team_members = current_team_manager.get_current_team_members(guild)
     
-    # Process only current-team members' data
-    for member in current_team_members:
-        user_id_str = str(member.id)
-        if user_id_str in data:
-            user_info = data[user_id_str]
-            stats = count_user_statistics_for_range(member.id, from_date, to_date)
-            csv_row = {
-                "username": user_info.get("username", member.display_name),
-                "total_status_updates": stats["total_status_updates"],
-                "total_hours_worked": stats["total_hours_worked"],
-                "number_of_leaves": stats["total_leaves"],
-                "late_status_hours": stats["late_status_hours"],
-                "total_submissions": stats["total_submissions"],
-                "from_date": from_date.strftime("%d-%m-%Y"),
-                "to_date": to_date.strftime("%d-%m-%Y"),
-                "current_team_member": "Yes"
-            }
-            csv_data.append(csv_row)
+    casual_data = load_casual_leave_data()
     
     # Create filename
-    date_suffix = f"_{from_date.strftime('%d%m%Y')}_to_{to_date.strftime('%d%m%Y')}"
-    csv_file_path = CSV_EXPORT_FILE.replace('.csv', f'{date_suffix}_current_team_only.csv')
+    csv_file_path = CSV_EXPORT_DIR / f"activity_report_{from_date:%d%m%Y}_to_{to_date:%d%m%Y}_current_team_only.csv"
     
-    # Write to CSV
-    os.makedirs(os.path.dirname(csv_file_path), exist_ok=True)
-    with open(csv_file_path, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ["username", "total_status_updates", "total_hours_worked", 
-                     "number_of_leaves", "late_status_hours", "total_submissions",
-                     "from_date", "to_date", "current_team_member"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(csv_data)
+    fieldnames = ["username", "total_status_updates", "total_hours_worked", 
+                 "number_of_leaves", "late_status_hours", "total_submissions",
+                 "from_date", "to_date", "current_team_member"]
+    rows = []
+    for member in current_team_members:
+        user_id_str = str(member.id)
+        if user_id_str not in data:
+            continue
+        user_info = data[user_id_str]
+        leaves = casual_data.get(user_id_str, {}).get("leaves", [])
+        records = build_user_submission_records(user_info)
+        stats = count_user_statistics_from_records(records, leaves, from_date, to_date)
+        rows.append((
+            user_info.get("username", member.display_name),
+            stats["total_status_updates"],
+            stats["total_hours_worked"],
+            stats["total_leaves"],
+            stats["late_status_hours"],
+            stats["total_submissions"],
+            from_date_str,
+            to_date_str,
+            "Yes"
+        ))
     
+    await asyncio.to_thread(write_csv, csv_file_path, fieldnames, rows)
     return csv_file_path
 
 @bot.event
 async def on_ready():
     print(f'{bot.user.name} has connected to Discord!')
-    bot.add_view(LeaveApprovalView(request_id="dummy"))
+    bot.add_dynamic_items(LeaveActionButton)
+    global WFH_SELECT_VIEW, LEAVE_TYPE_VIEW, SUPPORT_VIEW
+    if SUPPORT_VIEW is None:
+        WFH_SELECT_VIEW = WFHSelect()
+        LEAVE_TYPE_VIEW = LeaveTypeView()
+        SUPPORT_VIEW = SupportView()
+        for view in (WFH_SELECT_VIEW, LEAVE_TYPE_VIEW, SUPPORT_VIEW):
+            bot.add_view(view)
     print('Bot is ready to receive commands.')
     try:
         synced = await bot.tree.sync()
@@ -104,24 +125,56 @@ async def on_ready():
 @bot.event
 async def on_member_update(before: discord.Member, after: discord.Member):
     """Handle role changes to update current-team cache."""
-
+    # Most member updates (nicknames, avatars, ...) leave the roles untouched
+    if {role.id for role in before.roles} == {role.id for role in after.roles}:
+        return
     
-    before_roles = set(role.name.lower() for role in before.roles)
-    after_roles = set(role.name.lower() for role in after.roles)
-    
-    current_team_role = CURRENT_TEAM_ROLE_NAME.lower()
+    had_role = any(role.name.lower() == CURRENT_TEAM_ROLE_NAME_LOWER for role in before.roles)
+    has_role = any(role.name.lower() == CURRENT_TEAM_ROLE_NAME_LOWER for role in after.roles)
     
     # Check if current-team role was added or removed
-    if current_team_role in after_roles and current_team_role not in before_roles:
+    if has_role and not had_role:
         # Role added
         current_team_manager.add_member_to_cache(after.guild.id, after.id)
         print(f"Added {after.display_name} to current-team cache")
         
-    elif current_team_role in before_roles and current_team_role not in after_roles:
+    elif had_role and not has_role:
         # Role removed
         current_team_manager.remove_member_from_cache(after.guild.id, after.id)
         print(f"Removed {after.display_name} from current-team cache")
 
+@bot.event
+async def on_guild_channel_create(channel: discord.abc.GuildChannel):
+    invalidate_channel_cache(channel)
+    forget_channel(channel.id)
+
+@bot.event
+async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+    invalidate_channel_cache(channel)
+    forget_channel(channel.id)
+
+@bot.event
+async def on_guild_channel_update(before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+    invalidate_channel_cache(before)
+    invalidate_channel_cache(after)
+    # Permission changes can make a channel visible to the bot again
+    forget_channel(after.id)
+
+@bot.event
+async def on_guild_role_create(role: discord.Role):
+    invalidate_role_caches(role.guild.id)
+    invalidate_core_role_cache(role.guild.id)
+
+@bot.event
+async def on_guild_role_delete(role: discord.Role):
+    invalidate_role_caches(role.guild.id)
+    invalidate_core_role_cache(role.guild.id)
+
+@bot.event
+async def on_guild_role_update(before: discord.Role, after: discord.Role):
+    invalidate_role_caches(after.guild.id)
+    invalidate_core_role_cache(after.guild.id)
+
 class WFHSelect(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=None)
@@ -137,7 +190,7 @@ class WFHSelect(discord.ui.View):
     )
     async def wfh_select_callback(self, interaction: discord.Interaction, select: discord.ui.Select):
         # Check if user is current-team member before allowing interaction
-        if not current_team_manager.is_current_team_member(interaction.user):
+        if interaction.user.id not in current_team_manager.member_ids(interaction.guild):
             await interaction.response.send_message(
                 "Access denied. This bot only monitors members with the 'current-team' role.",
                 ephemeral=True
@@ -148,6 +201,13 @@ class WFHSelect(discord.ui.View):
         modal = StatusForm(wfh_option=wfh_option)
         await interaction.response.send_modal(modal)
 
+# Leave type select value -> modal to show for it
+LEAVE_MODALS = {
+    "casual": CasualLeaveModal,
+    "medical": MedicalLeaveModal,
+    "special": SpecialLeaveModal,
+}
+
 class LeaveTypeView(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=None)
@@ -164,7 +224,7 @@ class LeaveTypeView(discord.ui.View):
     )
     async def leave_type_callback(self, interaction: discord.Interaction, select: discord.ui.Select):
         # Check if user is current-team member before allowing interaction
-        if not current_team_manager.is_current_team_member(interaction.user):
+        if interaction.user.id not in current_team_manager.member_ids(interaction.guild):
             await interaction.response.send_message(
                 "Access denied. This bot only monitors members with the 'current-team' role.",
                 ephemeral=True
@@ -173,17 +233,12 @@ class LeaveTypeView(discord.ui.View):
             
         selected_type = select.values[0]
         
-        if selected_type == "casual":
-            modal = CasualLeaveModal()
-        elif selected_type == "medical":
-            modal = MedicalLeaveModal()
-        elif selected_type == "special":
-            modal = SpecialLeaveModal()
-        else:
+        modal_cls = LEAVE_MODALS.get(selected_type)
+        if modal_cls is None:
             await interaction.response.send_message("Invalid leave type selected.", ephemeral=True)
             return
 
-        await interaction.response.send_modal(modal)
+        await interaction.response.send_modal(modal_cls())
 
 class SupportView(discord.ui.View):
     def __init__(self):
@@ -192,26 +247,32 @@ class SupportView(discord.ui.View):
     @discord.ui.button(label="Status Updates", style=discord.ButtonStyle.green, custom_id="status_updates_btn")
     async def status_updates_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         # Check if user is current-team member before allowing interaction
-        if not current_team_manager.is_current_team_member(interaction.user):
+        if interaction.user.id not in current_team_manager.member_ids(interaction.guild):
             await interaction.response.send_message(
                 "Access denied. This bot only monitors members with the 'current-team' role.",
                 ephemeral=True
             )
             return
             
-        await interaction.response.send_message("Are you working from the hostel today?", view=WFHSelect(), ephemeral=True)
+        await interaction.response.send_message("Are you working from the hostel today?", view=WFH_SELECT_VIEW, ephemeral=True)
 
     @discord.ui.button(label="Leave Tracking", style=discord.ButtonStyle.blurple, custom_id="leave_tracking_btn")
     async def leave_tracking_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         # Check if user is current-team member before allowing interaction
-        if not current_team_manager.is_current_team_member(interaction.user):
+        if interaction.user.id not in current_team_manager.member_ids(interaction.guild):
             await interaction.response.send_message(
                 "Access denied. This bot only monitors members with the 'current-team' role.",
                 ephemeral=True
             )
             return
             
-        await interaction.response.send_message("Please select the type of leave:", view=LeaveTypeView(), ephemeral=True)
+        await interaction.response.send_message("Please select the type of leave:", view=LEAVE_TYPE_VIEW, ephemeral=True)
+
+# These views hold no per-user state, so one instance of each is shared by every message.
+# discord.py views need a running event loop, so they are created in on_ready.
+WFH_SELECT_VIEW = None
+LEAVE_TYPE_VIEW = None
+SUPPORT_VIEW = None
 
 @bot.tree.command(name="setup_support_channel", description="Sets up the main support message with buttons.")
 @commands.is_owner()
@@ -228,7 +289,7 @@ async def setup_support_channel(interaction: discord.Interaction):
             description="Use the buttons below to submit your daily status update or to request leave.",
             color=discord.Color.blue()
         )
-        await channel.send(embed=embed, view=SupportView())
+        await channel.send(embed=embed, view=SUPPORT_VIEW)
         
         await interaction.followup.send("Support channel message has been set up!", ephemeral=True)
     
@@ -267,7 +328,7 @@ async def export_csv_command(interaction: discord.Interaction, from_date: str =
             await interaction.followup.send("from_date cannot be after to_date.", ephemeral=True)
             return
 
-        csv_file_path = export_current_team_csv(interaction.guild, parsed_from_date, parsed_to_date)
+        csv_file_path = await export_current_team_csv(interaction.guild, parsed_from_date, parsed_to_date)
         
         if parsed_from_date and parsed_to_date:
             date_info = f" for current-team members from {from_date} to {to_date}"
@@ -288,8 +349,6 @@ async def export_csv_command(interaction: discord.Interaction, from_date: str =
 async def weekly_report(interaction: discord.Interaction, user: discord.Member = None, week_offset: int = 0):
     await interaction.response.defer(ephemeral=True)
     
-    from .core.user_stats import get_weekly_stats
-    
     # Calculate week start (Monday) for the specified offset
     today = datetime.date.today()
     days_since_monday = today.weekday()
@@ -341,9 +400,10 @@ async def weekly_report(interaction: discord.Interaction, user: discord.Member =
         current_team_members = current_team_manager.get_current_team_members(interaction.guild)
         summary_data = []
         current_team_count = len(current_team_members)
+        stats_map = get_weekly_stats_bulk([member.id for member in current_team_members], target_week_monday)
         
         for member in current_team_members:
-            stats = get_weekly_stats(member.id, target_week_monday)
+            stats = stats_map[member.id]
             if stats["submissions_count"] > 0:  # Only include users with submissions
                 summary_data.append({
                     "name": member.display_name,
@@ -385,75 +445,91 @@ async def refresh_current_team_cache(interaction: discord.Interaction):
     await interaction.followup.send(f"Current-team cache refreshed. Found {count} active members.", ephemeral=True)
 
 # Background task to check for daily warnings at midnight IST
-@tasks.loop(time=datetime.time(hour=18, minute=30, tzinfo=datetime.timezone.utc))  # 12:00 AM IST
+@tasks.loop(time=datetime.time(hour=0, minute=0, tzinfo=IST))
 async def check_daily_warnings():
-    print("Running daily warning check...")
+    logger.info("Running daily warning check...")
     
     # Calculate yesterday's date in IST
-    ist_timezone = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
-    ist_now = datetime.datetime.now(ist_timezone)
+    ist_now = datetime.datetime.now(IST)
     yesterday = (ist_now - datetime.timedelta(days=1)).date()
     
-    print(f"Checking submissions for date: {yesterday}")
+    logger.info("Checking submissions for date: %s", yesterday)
+    
+    # Load leave and submission data once for the whole sweep
+    date_index = build_date_index(yesterday)
+    leave_ids, submitted_ids = date_index
     
     # Check all guilds
     for guild in bot.guilds:
-        print(f"Checking guild: {guild.name}")
+        logger.info("Checking guild: %s", guild.name)
         warning_count = 0
         
-        # Get current-team members efficiently
-        current_team_members = current_team_manager.get_current_team_members(guild)
+        # Get current-team members efficiently, frozen for the whole sweep
+        current_team_members = tuple(current_team_manager.get_current_team_members(guild))
         current_team_members_count = len(current_team_members)
         
-        print(f"Found {current_team_members_count} current-team members")
+        logger.info("Found %d current-team members", current_team_members_count)
         
-        for member in current_team_members:
-            try:
-                if await should_give_warning(member, yesterday):
-                    await give_warning(bot, member)
-                    warning_count += 1
-                    print(f"Warning given to {member.display_name}")
-                else:
+        semaphore = asyncio.Semaphore(WARNING_CONCURRENCY)
+        
+        async def process_member(member):
+            """Warn one member if needed; returns True when a warning was given."""
+            async with semaphore:
+                try:
+                    if await should_give_warning(member, yesterday, date_index):
+                        await give_warning(bot, member)
+                        logger.info("Warning given to %s", member.display_name)
+                        return True
+                    
                     # Log why warning was skipped
                     if member.bot:
                         reason = "bot"
-                    elif any(role.name in ["Core Member", "4th_years"] for role in member.roles):
+                    elif is_exempt_member(member):
                         reason = "core member/4th year (exempt)"
                     else:
                         
-                        if user_has_leave_on_date(member.id, yesterday):
+                        if member.id in leave_ids:
                             reason = "has approved leave"
-                        elif get_user_submissions_for_date(member.id, yesterday):
+                        elif member.id in submitted_ids:
                             reason = "already submitted"
                         else:
                             reason = "no required roles"
                     
-                    print(f"Skipped warning for {member.display_name}: {reason}")
-                    
-            except Exception as e:
-                print(f"Error checking warning for {member.display_name}: {e}")
+                    logger.debug("Skipped warning for %s: %s", member.display_name, reason)
+                        
+                except Exception as e:
+                    logger.error("Error checking warning for %s: %s", member.display_name, e)
+                return False
+        
+        # Process members in batches to stay well inside Discord's rate limits
+        for i in range(0, current_team_members_count, WARNING_BATCH_SIZE):
+            batch = current_team_members[i:i + WARNING_BATCH_SIZE]
+            results = await asyncio.gather(*(process_member(member) for member in batch))
+            warning_count += sum(results)
         
-        print(f"Checked {current_team_members_count} current-team members in {guild.name}")
-        print(f"Total warnings given: {warning_count}")
+        logger.info("Checked %d current-team members in %s", current_team_members_count, guild.name)
+        logger.info("Total warnings given: %d", warning_count)
 
 # 11:00 PM IST reminder for daily status updates
-@tasks.loop(time=datetime.time(hour=8, minute=50, tzinfo=datetime.timezone.utc))  # 11:59 PM IST
+@tasks.loop(time=datetime.time(hour=23, minute=0, tzinfo=IST))
 async def daily_reminder():
     """
     Send daily reminders to users who haven't submitted status.
     Uses channel_lookup.py to find the correct channel for each user.
     """
-    print("Running 11 PM daily reminder check...")
+    logger.info("Running 11 PM daily reminder check...")
     
-    ist_timezone = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
-    ist_now = datetime.datetime.now(ist_timezone)
+    ist_now = datetime.datetime.now(IST)
     today = ist_now.date()
     
     for guild in bot.guilds:
-        print(f"Checking reminders for guild: {guild.name}")
+        logger.info("Checking reminders for guild: %s", guild.name)
         
-        # Get current-team members who haven't submitted today
-        non_submitters = get_users_without_submission_for_date(guild.members, today)
+        # Get current-team members who haven't submitted today, frozen for the whole pass
+        current_team_members = tuple(current_team_manager.get_current_team_members(guild))
+        non_submitters = get_users_without_submission_for_date(current_team_members, today)
+        
+        on_leave_ids = get_leaves_by_users_for_date([member.id for member in non_submitters], today)
         
         # Filter for current-team members with proper roles
         valid_non_submitters = []
@@ -464,8 +540,8 @@ async def daily_reminder():
             # Check if member is current-team
             if not current_team_manager.is_current_team_member(member):
                 continue
-            if user_has_leave_on_date(member.id, today):
-                print(f"Skipped reminder for {member.display_name}: on approved leave")
+            if member.id in on_leave_ids:
+                logger.debug("Skipped reminder for %s: on approved leave", member.display_name)
                 continue
 
             try:
@@ -476,61 +552,87 @@ async def daily_reminder():
                 continue
         
         if not valid_non_submitters:
-            print(f"No valid non-submitters found in {guild.name}")
+            logger.info("No valid non-submitters found in %s", guild.name)
             continue
         
-        print(f"Found {len(valid_non_submitters)} members who need reminders")
+        logger.info("Found %d members who need reminders", len(valid_non_submitters))
         
         # Group members by their status channel
-        channel_to_members = {}
+        channel_to_members = defaultdict(lambda: {"channel": None, "members": []})
+        # Members with the same roles always map to the same channel
+        channel_by_roles = {}
         
         for member in valid_non_submitters:
             try:
                 # Use channel_lookup to find the correct channel for this user
-                user_channel = await get_user_status_channel(guild, member.roles)
+                roles_key = frozenset(role.id for role in member.roles)
+                if roles_key in channel_by_roles:
+                    user_channel = channel_by_roles[roles_key]
+                else:
+                    user_channel = await get_user_status_channel(guild, member.roles)
+                    channel_by_roles[roles_key] = user_channel
                 
                 if user_channel:
-                    if user_channel.id not in channel_to_members:
-                        channel_to_members[user_channel.id] = {
-                            "channel": user_channel,
-                            "members": []
-                        }
-                    channel_to_members[user_channel.id]["members"].append(member)
-                    print(f"  - {member.display_name} → {user_channel.name}")
+                    channel_data = channel_to_members[user_channel.id]
+                    channel_data["channel"] = user_channel
+                    channel_data["members"].append(member)
+                    logger.debug("  - %s → %s", member.display_name, user_channel.name)
                 else:
-                    print(f"  - Could not find channel for {member.display_name}")
+                    logger.warning("Could not find channel for %s", member.display_name)
                     
             except Exception as e:
-                print(f"Error finding channel for {member.display_name}: {e}")
+                logger.error("Error finding channel for %s: %s", member.display_name, e)
                 continue
         
         # Send reminders to each channel
-        reminders_sent = 0
-        for channel_data in channel_to_members.values():
-            channel = channel_data["channel"]
-            members = channel_data["members"]
+        async def send_reminder(channel, members):
+            """Post one reminder message; returns how many members it covered."""
+            # Limit to 10 mentions per message to avoid Discord limits
+            mention_str = ", ".join(member.mention for member in itertools.islice(members, 10))
+            remaining_count = max(0, len(members) - 10)
+            others = f" and {remaining_count} others" if remaining_count else ""
+            reminder_text = f"**11 PM Reminder:** {mention_str}{others} - Submit your daily status update! Deadline is 11:59 PM."
             
-            if members:
-                # Limit to 10 mentions per message to avoid Discord limits
-                mention_list = [member.mention for member in members[:10]]
-                remaining_count = len(members) - 10
-                
-                reminder_text = f"**11 PM Reminder:** {', '.join(mention_list)}"
-                if remaining_count > 0:
-                    reminder_text += f" and {remaining_count} others"
-                reminder_text += " - Submit your daily status update! Deadline is 11:59 PM."
-                
-                try:
-                    await channel.send(reminder_text)
-                    print(f"✅ Sent reminder to {len(members)} members in {channel.name}")
-                    reminders_sent += len(members)
-                except Exception as e:
-                    print(f"❌ Error sending reminder to {channel.name}: {e}")
+            try:
+                await channel.send(reminder_text)
+                logger.info("Sent reminder to %d members in %s", len(members), channel.name)
+                return len(members)
+            except Exception as e:
+                logger.error("Error sending reminder to %s: %s", channel.name, e)
+                return 0
+        
+        results = await asyncio.gather(*(
+            send_reminder(channel_data["channel"], channel_data["members"])
+            for channel_data in channel_to_members.values()
+            if channel_data["members"]
+        ))
+        reminders_sent = sum(results)
         
-        print(f"Total reminders sent in {guild.name}: {reminders_sent} members")
+        logger.info("Total reminders sent in %s: %d members", guild.name, reminders_sent)
+
+def setup_logging():
+    """
+    Route this module's log records through a buffer that is written out in one go
+    whenever an INFO-or-higher record arrives, instead of flushing stdout per line.
+    Set LOG_LEVEL=DEBUG to include the per-member lines of the daily tasks.
+    """
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    memory_handler = logging.handlers.MemoryHandler(capacity=1024, flushLevel=logging.INFO, target=stream_handler)
+    logger.addHandler(memory_handler)
+    logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
 
 if __name__ == "__main__":
+    setup_logging()
     if not TOKEN:
         print("Error: DISCORD_BOT_TOKEN not found in .env file.")
     else:
+        try:
+            import uvloop
+        except ImportError:  # uvloop is optional (and not available on Windows)
+            pass
+        else:
+            uvloop.install()
+        validate_pending_requests()
         bot.run(TOKEN)
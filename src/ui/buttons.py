@@ -1,5 +1,9 @@
+import asyncio
+import time
+from typing import Optional
+from weakref import WeakValueDictionary
 import discord
-from ..core.user_stats import find_pending_request, update_pending_request
+from ..core.user_stats import find_pending_request, update_pending_request, STATUS_APPROVED, STATUS_DENIED
 
 ROLE_HIERARCHY = {
     "Trainee Member": 1,
@@ -8,14 +12,12 @@ ROLE_HIERARCHY = {
     "4th_years": 4,
     "Core Member": 4
 }
+ROLE_NAMES = frozenset(ROLE_HIERARCHY)
 
 
 def get_user_level(user_roles):
-    level = 0
-    for role in user_roles:
-        if role.name in ROLE_HIERARCHY:
-            level = max(level, ROLE_HIERARCHY[role.name])
-    return level
+    names = {role.name for role in user_roles} & ROLE_NAMES
+    return max((ROLE_HIERARCHY[name] for name in names), default=0)
 
 
 def can_approve_request(approver_roles, requester_roles):
@@ -27,141 +29,221 @@ def can_approve_request(approver_roles, requester_roles):
 
 def get_role_display_name(user_roles):
     """Get the display name of user's highest role"""
-    highest_level = 0
-    role_name = "Unknown"
+    names = {role.name for role in user_roles} & ROLE_NAMES
+    # Walk ROLE_HIERARCHY (not the set) so ties always resolve the same way
+    return max((name for name in ROLE_HIERARCHY if name in names), key=ROLE_HIERARCHY.get, default="Unknown")
+
+
+# Keeps fire-and-forget tasks referenced until they finish
+_background_tasks = set()
+
+# Shared by every decided request; views need a running event loop, so it is built on first use
+_disabled_view = {"view": None}
+
+
+def _get_disabled_view() -> discord.ui.View:
+    """The Approve/Deny/Thread buttons, all disabled, for requests that have been decided."""
+    view = _disabled_view["view"]
+    if view is None:
+        view = discord.ui.View(timeout=None)
+        view.add_item(discord.ui.Button(label="Approve", style=discord.ButtonStyle.green, disabled=True))
+        view.add_item(discord.ui.Button(label="Deny", style=discord.ButtonStyle.red, disabled=True))
+        view.add_item(discord.ui.Button(label="Thread", style=discord.ButtonStyle.blurple, disabled=True))
+        _disabled_view["view"] = view
+    return view
+
+
+LEAVE_TRACKING_CHANNEL_ID = 1415019014224089147
+LEAVE_REQUEST_CHANNEL_ID = 1416718401044349038
+
+# channel_id -> channel, or _MISSING_CHANNEL if it doesn't exist or can't be seen, for the fixed channels above
+_channels = {}
+_MISSING_CHANNEL = object()
+
+
+async def get_channel_once(client: discord.Client, channel_id: int):
+    """
+    Resolve a fixed channel once and keep it, fetching it over REST if it isn't cached.
+    client.get_channel() searches every guild, so hot paths shouldn't repeat it.
+    A channel that is gone or hidden from the bot is remembered as missing and logged once,
+    until forget_channel() is called for it.
+    """
+    channel = _channels.get(channel_id)
+    if channel is _MISSING_CHANNEL:
+        return None
+    if channel is None:
+        channel = client.get_channel(channel_id)
+        if channel is None:
+            try:
+                channel = await client.fetch_channel(channel_id)
+            except (discord.NotFound, discord.Forbidden) as e:
+                print(f"Channel {channel_id} is unavailable, messages for it will be skipped: {e}")
+                _channels[channel_id] = _MISSING_CHANNEL
+                return None
+            except discord.HTTPException:
+                return None  # Possibly transient; try again next time
+        _channels[channel_id] = channel
+    return channel
+
+
+def forget_channel(channel_id: int):
+    """Drop what get_channel_once() knows about a channel, e.g. after it was created, changed or deleted."""
+    _channels.pop(channel_id, None)
+
+
+# (guild_id, user_id) -> (member, monotonic expiry) for members fetched over REST
+_member_cache = {}
+MEMBER_CACHE_TTL = 300  # seconds
+MEMBER_CACHE_SIZE = 512
+
+
+async def _get_member(guild: discord.Guild, user_id: int) -> discord.Member:
+    """
+    Resolve a guild member from the gateway cache, then from recent REST fetches,
+    and only then with guild.fetch_member(). Raises discord.NotFound like fetch_member.
+    """
+    member = guild.get_member(user_id)
+    if member is not None:
+        return member
+
+    key = (guild.id, user_id)
+    cached = _member_cache.get(key)
+    now = time.monotonic()
+    if cached is not None and cached[1] > now:
+        return cached[0]
+
+    member = await guild.fetch_member(user_id)
+    _member_cache.pop(key, None)
+    if len(_member_cache) >= MEMBER_CACHE_SIZE:
+        # Drop the oldest entry; dicts keep insertion order
+        del _member_cache[next(iter(_member_cache))]
+    _member_cache[key] = (member, now + MEMBER_CACHE_TTL)
+    return member
+
+
+# action -> (label, style) of the buttons on a leave request
+LEAVE_ACTIONS = {
+    "approve": ("Approve", discord.ButtonStyle.green),
+    "deny": ("Deny", discord.ButtonStyle.red),
+    "create_thread": ("Thread", discord.ButtonStyle.blurple),
+}
+
+
+class LeaveActionButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"leave_(?P<action>approve|deny|create_thread)(?::(?P<request_id>[\w-]+)|_btn)"
+):
+    """
+    A leave request button that carries its request id in its custom_id, so clicks are
+    routed correctly even after a restart. Register it once with bot.add_dynamic_items().
+    Messages sent before ids were embedded use "leave_<action>_btn" and resolve to no request.
+    """
+
+    def __init__(self, action: str, request_id: Optional[str]):
+        label, style = LEAVE_ACTIONS[action]
+        custom_id = f"leave_{action}:{request_id}" if request_id else f"leave_{action}_btn"
+        super().__init__(discord.ui.Button(label=label, style=style, custom_id=custom_id))
+        self.action = action
+        self.request_id = request_id
 
-    for role in user_roles:
-        if role.name in ROLE_HIERARCHY:
-            level = ROLE_HIERARCHY[role.name]
-            if level > highest_level:
-                highest_level = level
-                role_name = role.name
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["action"], match["request_id"])
 
-    return role_name
+    async def callback(self, interaction: discord.Interaction):
+        view = LeaveApprovalView(request_id=self.request_id)
+        if self.action == "approve":
+            await view._finalize(interaction, STATUS_APPROVED, "Approved", discord.Color.green())
+        elif self.action == "deny":
+            await view._finalize(interaction, STATUS_DENIED, "Denied", discord.Color.red())
+        else:
+            await view.create_thread(interaction)
 
 
 class LeaveApprovalView(discord.ui.View):
+    # request_id -> live view, so every message for one request shares a single view
+    _instances = WeakValueDictionary()
+
+    def __new__(cls, request_id: str):
+        view = cls._instances.get(request_id)
+        if view is None:
+            view = super().__new__(cls)
+            cls._instances[request_id] = view
+        return view
+
     def __init__(self, request_id: str):
+        if hasattr(self, "request_id"):
+            return  # Reused instance, already set up
         super().__init__(timeout=None)
         self.request_id = request_id
+        for action in LEAVE_ACTIONS:
+            self.add_item(LeaveActionButton(action, request_id))
 
     async def _close_thread(self, thread: discord.Thread, reason: str, approver_name: str):
         await thread.edit(name=f"{thread.name} - ({reason})", locked=True, archived=True)
         await thread.send(f"This thread has been closed by {approver_name}.")
 
-    async def _check_permissions(self, interaction: discord.Interaction, requester_id: int) -> bool:
-        """Enhanced permission checking with proper hierarchy"""
+    async def _check_permissions(self, interaction: discord.Interaction, requester_id: int) -> Optional[discord.Member]:
+        """
+        Enhanced permission checking with proper hierarchy.
+        Returns the requester when the user may handle the request, otherwise None.
+        """
         # 1. Users cannot approve their own requests
         if interaction.user.id == requester_id:
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 "You cannot approve or deny your own leave request.",
                 ephemeral=True
             )
-            return False
+            return None
 
         # 2. Get requester member object
         try:
-            requester = await interaction.guild.fetch_member(requester_id)
+            requester = await _get_member(interaction.guild, requester_id)
         except discord.NotFound:
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 "Could not find the user who requested this leave.",
                 ephemeral=True
             )
-            return False
+            return None
 
         # 3. Check hierarchy permissions
         if not can_approve_request(interaction.user.roles, requester.roles):
-            approver_role = get_role_display_name(interaction.user.roles)
-            requester_role = get_role_display_name(requester.roles)
-
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 f"Insufficient permissions.",
                 ephemeral=True
             )
-            return False
+            return None
+
+        return requester
 
-        return True
+    async def _finalize(self, interaction: discord.Interaction, status: str, verb: str, color: discord.Color):
+        """Shared approve/deny flow: check permissions, record the decision and announce it."""
+        # Acknowledge right away; the work below can take longer than Discord's 3 second window
+        await interaction.response.defer()
 
-    @discord.ui.button(label="Approve", style=discord.ButtonStyle.green, custom_id="leave_approve_btn")
-    async def approve_button_callback(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Update request status first
-        request_data = update_pending_request(self.request_id, "approved", interaction.user.id)
+        request_data = find_pending_request(self.request_id)
         if not request_data:
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 "This request no longer exists or has already been handled.",
                 ephemeral=True
             )
             return
 
-        # Check permissions
-        if not await self._check_permissions(interaction, request_data["member_id"]):
-            return
-
-        # Get participants
-        approver = interaction.user
-        try:
-            requester = await interaction.guild.fetch_member(request_data["member_id"])
-        except discord.NotFound:
-            await interaction.response.send_message("Could not find the requester.", ephemeral=True)
+        # Check permissions before touching the stored request
+        requester = await self._check_permissions(interaction, request_data["member_id"])
+        if requester is None:
             return
 
-        # Extract request details
-        leave_type = request_data.get("type", "Unknown").capitalize()
-        start_date = request_data["dates"]["start"]
-        end_date = request_data["dates"]["end"]
-        reason = request_data.get("reason", "No reason provided")
-        mode = request_data.get("mode", "")
-
-        # Create tracking message
-        mode_text = f"\nMode: {mode}" if mode else ""
-        leave_tracking_message = f"""```Leave on ({start_date} to {end_date})
-Leave Type: {leave_type}
-Reason: {reason}{mode_text}```From {requester.mention} Approved by: {approver.mention}"""
-
-        # Update embed
-        original_embed = interaction.message.embeds[0]
-        original_embed.title = "Leave Request - Approved"
-        original_embed.color = discord.Color.green()
-        original_embed.set_footer(text=f"Approved by {approver.display_name} ({get_role_display_name(approver.roles)})")
-
-        # Disable buttons
-        for child in self.children:
-            child.disabled = True
-
-        await interaction.response.edit_message(embed=original_embed, view=self)
-
-        # Post to tracking channel
-        leave_tracking_channel_id = 1415019014224089147
-        leave_tracking_channel = interaction.client.get_channel(leave_tracking_channel_id)
-        if leave_tracking_channel:
-            await leave_tracking_channel.send(leave_tracking_message)
-
-        # Close thread if in one
-        if isinstance(interaction.channel, discord.Thread):
-            await self._close_thread(interaction.channel, "Approved", approver.display_name)
-
-    @discord.ui.button(label="Deny", style=discord.ButtonStyle.red, custom_id="leave_deny_btn")
-    async def deny_button_callback(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # Update request status first
-        request_data = update_pending_request(self.request_id, "denied", interaction.user.id)
+        request_data = update_pending_request(self.request_id, status, interaction.user.id)
         if not request_data:
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 "This request no longer exists or has already been handled.",
                 ephemeral=True
             )
             return
 
-        # Check permissions
-        if not await self._check_permissions(interaction, request_data["member_id"]):
-            return
-
         # Get participants
         approver = interaction.user
-        try:
-            requester = await interaction.guild.fetch_member(request_data["member_id"])
-        except discord.NotFound:
-            await interaction.response.send_message("Could not find the requester.", ephemeral=True)
-            return
 
         # Extract request details
         leave_type = request_data.get("type", "Unknown").capitalize()
@@ -171,44 +253,60 @@ Reason: {reason}{mode_text}```From {requester.mention} Approved by: {approver.me
         mode = request_data.get("mode", "")
 
         # Create tracking message
-        mode_text = f"\nMode: {mode}" if mode else ""
-        leave_tracking_message = f"""```Leave on ({start_date} to {end_date})
-Leave Type: {leave_type}
-Reason: {reason}{mode_text}```From {requester.mention} Denied by: {approver.mention}"""
+        parts = [f"```Leave on ({start_date} to {end_date})", f"Leave Type: {leave_type}", f"Reason: {reason}"]
+        if mode:
+            parts.append(f"Mode: {mode}")
+        leave_tracking_message = "\n".join(parts) + f"```From {requester.mention} {verb} by: {approver.mention}"
 
         # Update embed
-        original_embed = interaction.message.embeds[0]
-        original_embed.title = "Leave Request - Denied"
-        original_embed.color = discord.Color.red()
-        original_embed.set_footer(text=f"Denied by {approver.display_name} ({get_role_display_name(approver.roles)})")
-
-        # Disable buttons
-        for child in self.children:
-            child.disabled = True
+        embed_data = interaction.message.embeds[0].to_dict()
+        embed_data["title"] = f"Leave Request - {verb}"
+        embed_data["color"] = color.value
+        embed_data["footer"] = {"text": f"{verb} by {approver.display_name} ({get_role_display_name(approver.roles)})"}
+        updated_embed = discord.Embed.from_dict(embed_data)
+
+        # Swap in the disabled buttons
+        await interaction.edit_original_response(embed=updated_embed, view=_get_disabled_view())
+
+        # The approver only waits for the edit above; announcing the decision happens in the background
+        thread = interaction.channel if isinstance(interaction.channel, discord.Thread) else None
+        task = asyncio.create_task(
+            self._announce_decision(interaction.client, thread, leave_tracking_message, status, verb, approver.display_name)
+        )
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
 
-        await interaction.response.edit_message(embed=original_embed, view=self)
+    async def _announce_decision(self, client, thread, leave_tracking_message, status, verb, approver_name):
+        """Post to the tracking channel and close the request's thread, if any, concurrently."""
+        # The thread is only archived after the embed edit, since archived threads reject message edits
+        pending = []
 
-        # Post to tracking channel
-        leave_tracking_channel_id = 1415019014224089147
-        leave_tracking_channel = interaction.client.get_channel(leave_tracking_channel_id)
+        leave_tracking_channel = await get_channel_once(client, LEAVE_TRACKING_CHANNEL_ID)
         if leave_tracking_channel:
-            await leave_tracking_channel.send(leave_tracking_message)
+            pending.append(leave_tracking_channel.send(leave_tracking_message))
+
+        if thread is not None:
+            pending.append(self._close_thread(thread, verb, approver_name))
+
+        # One failed call shouldn't cancel the others
+        for result in await asyncio.gather(*pending, return_exceptions=True):
+            if isinstance(result, Exception):
+                print(f"Error finishing {status} leave request {self.request_id}: {result}")
 
-        # Close thread if in one
-        if isinstance(interaction.channel, discord.Thread):
-            await self._close_thread(interaction.channel, "Denied", approver.display_name)
+    async def create_thread(self, interaction: discord.Interaction):
+        """Open a private discussion thread for the request, with its own approval buttons."""
+        # Acknowledge right away; creating and filling the thread takes several REST calls
+        await interaction.response.defer(ephemeral=True)
 
-    @discord.ui.button(label="Thread", style=discord.ButtonStyle.blurple, custom_id="leave_create_thread_btn")
-    async def create_thread_button_callback(self, interaction: discord.Interaction, button: discord.ui.Button):
         request_data = find_pending_request(self.request_id)
         if not request_data:
-            await interaction.response.send_message("This request no longer exists.", ephemeral=True)
+            await interaction.followup.send("This request no longer exists.", ephemeral=True)
             return
 
         try:
-            requester = await interaction.guild.fetch_member(request_data["member_id"])
+            requester = await _get_member(interaction.guild, request_data["member_id"])
         except discord.NotFound:
-            await interaction.response.send_message("Could not find the requester.", ephemeral=True)
+            await interaction.followup.send("Could not find the requester.", ephemeral=True)
             return
 
         # Create thread
@@ -218,13 +316,10 @@ Reason: {reason}{mode_text}```From {requester.mention} Denied by: {approver.ment
             invitable=False
         )
 
-        # Add the requester to the private thread
-        await thread.add_user(requester)
+        # Add the requester and the person who created the thread to the private thread
+        await asyncio.gather(thread.add_user(requester), thread.add_user(interaction.user))
 
-        # Add the person who created the thread
-        await thread.add_user(interaction.user)
-
-        # Post content to thread
+        # Post content to thread; sent in order so the approval buttons stay on top
         if interaction.message.embeds:
             await thread.send(
                 embed=interaction.message.embeds[0],
@@ -235,15 +330,11 @@ Reason: {reason}{mode_text}```From {requester.mention} Denied by: {approver.ment
                 f"Leave discussion for {requester.mention}",
                 view=LeaveApprovalView(request_id=self.request_id)
             )
-
         await thread.send(f"Hey {requester.mention}, {interaction.user.mention} started this discussion thread.")
-        await interaction.response.send_message("Thread created with approval buttons.", ephemeral=True)
+        await interaction.followup.send("Thread created with approval buttons.", ephemeral=True)
 
 
 # Helper function to check if user has sufficient level for auto-approval
 def has_auto_approval_privilege(user_roles):
     """Check if user gets auto-approval (Core Members only)"""
-    for role in user_roles:
-        if role.name == "Core Member":
-            return True
-    return False
+    return any(role.name == "Core Member" for role in user_roles)
@@ -1,44 +1,51 @@
+import asyncio
 import discord
 import datetime
-import json
+import math
 import os
 import uuid
-import re
 import csv
-from ..core.user_stats import record_status_update, load_pending_requests, save_pending_requests, load_user_data, save_user_data,get_user_submissions_for_date
-from ..core.channel_lookup import get_user_status_channel
-from ..ui.buttons import LeaveApprovalView
+from ..core.user_stats import record_status_update, append_pending_request, load_user_data, save_user_data,get_user_submissions_for_date, load_casual_leave_data, build_user_submission_records, count_user_statistics_from_records, month_key, week_key, iso_date, DATA_FILE, CASUAL_LEAVE_FILE, STATUS_PENDING, STATUS_AUTO_APPROVED
+from ..core.utils import save_json, atomic_open, ensure_dir, json_parse_generation
+from ..core.channel_lookup import get_user_status_channel, TEAM_CATEGORY_MAP, YEAR_CHANNEL_PREFIX_MAP
+from ..ui.buttons import LeaveApprovalView, get_channel_once, LEAVE_TRACKING_CHANNEL_ID, LEAVE_REQUEST_CHANNEL_ID
 
 
 # =====================
 # Helper Functions
 # =====================
 
-CASUAL_HISTORY_FILE = os.path.join("data", "casual_leave.json")
+CASUAL_HISTORY_FILE = CASUAL_LEAVE_FILE
 CSV_EXPORT_FILE = os.path.join("data", "activity_report.csv")
+CSV_WRITE_BUFFER_SIZE = 1024 * 1024  # 1 MiB, so large exports need few write() calls
+EXPORT_DELAY_SECONDS = 30  # Coalesce the CSV exports triggered by submissions within this window
+_export_writer = {"dirty": False, "task": None}
+# Key (date range, users.json and casual_leave.json parse generations) of the last export,
+# and user_id_str -> (fingerprint, CSV row) for it
+_export_rows = {"key": None, "rows": {}}
+# guild_id -> id of the guild's Core Member role, or None if it has none
+_core_role_ids = {}
+
+LEAVE_REQUEST_COLOR = discord.Color.gold()
+LEAVE_CHANNEL_MISSING_MESSAGE = "The leave request channel is misconfigured, so your request could not be submitted. Please contact an admin."
 
 def load_casual_leave_history():
-    if not os.path.exists(CASUAL_HISTORY_FILE):
-        return {}
-    with open(CASUAL_HISTORY_FILE, "r") as f:
-        return json.load(f)
+    return load_casual_leave_data()
 
 def save_casual_leave_history(data):
-    os.makedirs(os.path.dirname(CASUAL_HISTORY_FILE), exist_ok=True)
-    with open(CASUAL_HISTORY_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+    save_json(CASUAL_HISTORY_FILE, data, indent=4)
+
+# Core Members and 4th years have no casual leave limit, unless they are 3rd year Core Members
+UNLIMITED_LEAVE_ROLES = frozenset({"Core Member", "4th_years"})
+THIRD_YEAR_CORE_ROLES = frozenset({"3rd_years", "Core Member"})
 
 def has_unlimited_casual_leave(user_roles):
     """Check if user has privilege for unlimited casual leave."""
-    role_names = [r.name for r in user_roles]
-    if "Core Member" in role_names or "4th_years" in role_names:
-        return True
-    return False
+    return not UNLIMITED_LEAVE_ROLES.isdisjoint(role.name for role in user_roles)
 
 def is_3rd_year_core_member(user_roles):
     """Check if user is both 3rd year AND Core Member"""
-    role_names = [role.name for role in user_roles]
-    return "3rd_years" in role_names and "Core Member" in role_names
+    return THIRD_YEAR_CORE_ROLES <= {role.name for role in user_roles}
 
 def get_casual_leave_limit(user_roles):
     """
@@ -49,14 +56,14 @@ def get_casual_leave_limit(user_roles):
     - float("inf"): Other Core Members or 4th years
     - 2: Regular members
     """
-    role_names = [role.name for role in user_roles]
+    role_names = {role.name for role in user_roles}
     
     # 3rd year Core Members get 10 days
-    if "3rd_years" in role_names and "Core Member" in role_names:
+    if THIRD_YEAR_CORE_ROLES <= role_names:
         return 10
     
     # Other Core Members and 4th years get unlimited
-    if "Core Member" in role_names or "4th_years" in role_names:
+    if not UNLIMITED_LEAVE_ROLES.isdisjoint(role_names):
         return float("inf")
     
     # Regular members get 2 days per month
@@ -86,15 +93,12 @@ def get_casual_leave_usage(user_id, month, year, roles=None):
         if allowed_days != float("inf"):
             allowed_days += bonus_days
 
-    # Calculate used days for this month
+    # Calculate used days for this month, visiting only the leaves that start in it
     if user_id_str in data:
-        for record in data[user_id_str].get("leaves", []):
-            try:
-                record_date = datetime.datetime.strptime(record["start"], "%d-%m-%Y").date()
-                if record_date.month == month and record_date.year == year:
-                    used_days += record["days"]
-            except ValueError:
-                continue
+        user_leaves = data[user_id_str]
+        leaves = user_leaves.get("leaves", [])
+        for position in user_leaves["by_month"].get(f"{year:04d}-{month:02d}", []):
+            used_days += leaves[position]["days"]
 
     return used_days, allowed_days
 
@@ -103,11 +107,16 @@ def record_casual_leave(user_id, start_date_str, end_date_str, days):
     data = load_casual_leave_history()
     user_id_str = str(user_id)
     if user_id_str not in data:
-        data[user_id_str] = {"bonus_days": 0, "leaves": []}
+        data[user_id_str] = {"bonus_days": 0, "leaves": [], "by_month": {}}
 
-    data[user_id_str]["leaves"].append({
+    leaves = data[user_id_str]["leaves"]
+    data[user_id_str]["by_month"].setdefault(month_key(start_date_str), []).append(len(leaves))
+    leaves.append({
         "start": start_date_str,
         "end": end_date_str,
+        # Sortable copies, so lookups compare strings instead of reparsing the dates
+        "start_iso": iso_date(start_date_str),
+        "end_iso": iso_date(end_date_str),
         "days": days
     })
     save_casual_leave_history(data)
@@ -120,22 +129,14 @@ def get_week_dates(date):
 
 def get_weekly_hours(user_id, target_date):
     """Calculate total hours worked in the week containing target_date."""
-    monday, sunday = get_week_dates(target_date)
     data = load_user_data()
     user_id_str = str(user_id)
     
     if user_id_str not in data:
         return 0.0
     
-    total_hours = 0.0
-    submissions = data[user_id_str].get("submissions", {})
-    
-    for submission in submissions.values():
-        sub_date = datetime.datetime.strptime(submission["date"], "%d-%m-%Y").date()
-        if monday <= sub_date <= sunday:
-            total_hours += submission["hours"]
-    
-    return total_hours
+    # Kept up to date by record_status_update, so this is a single lookup
+    return data[user_id_str]["weekly_totals"].get(week_key(target_date), 0.0)
 
 def check_weekly_target(user_id, target_date, new_hours):
     """Check if adding new_hours would exceed or meet the 32-hour weekly target."""
@@ -174,10 +175,21 @@ def count_user_statistics(user_id):
     
     return stats
 
-def export_to_csv(from_date=None, to_date=None):
-    """Export user data to CSV format with optional date range filtering."""
+def write_csv(path, fieldnames, rows):
+    """Write a header and rows to a CSV file, replacing it atomically. Safe to call from a worker thread."""
+    ensure_dir(os.path.dirname(path))
+    with atomic_open(path, 'w', newline='', encoding='utf-8', buffering=CSV_WRITE_BUFFER_SIZE) as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(fieldnames)
+        writer.writerows(rows)
+
+def build_export(from_date=None, to_date=None):
+    """
+    Compute the activity CSV for a date range without writing it.
+    Returns (path, fieldnames, rows) for write_csv(). Reads the shared users.json data,
+    so call it on the event loop and only hand the result to a worker thread.
+    """
     data = load_user_data()
-    csv_data = []
     
     # If no date range specified, use all data
     if from_date is None:
@@ -185,107 +197,126 @@ def export_to_csv(from_date=None, to_date=None):
     if to_date is None:
         to_date = datetime.date.today()
     
-    for user_id, user_info in data.items():
-        stats = count_user_statistics_for_range(int(user_id), from_date, to_date)
-        csv_row = {
-            "username": user_info.get("username", "Unknown"),
-            "total_status_updates": stats["total_status_updates"],
-            "total_hours_worked": stats["total_hours_worked"],
-            "number_of_leaves": stats["total_leaves"],
-            "late_status_hours": stats["late_status_hours"],
-            "total_submissions": stats["total_submissions"],
-            "from_date": from_date.strftime("%d-%m-%Y"),
-            "to_date": to_date.strftime("%d-%m-%Y")
-        }
-        csv_data.append(csv_row)
+    from_date_str = from_date.strftime("%d-%m-%Y")
+    to_date_str = to_date.strftime("%d-%m-%Y")
+    
+    casual_data = load_casual_leave_history()
+    
+    # Rows from the previous export of this range stay valid for users whose data hasn't changed.
+    # Hand edits to either file bypass updated_at, so a re-read from disk starts over
+    key = (from_date, to_date, json_parse_generation(DATA_FILE), json_parse_generation(CASUAL_LEAVE_FILE))
+    if _export_rows["key"] != key:
+        _export_rows["key"] = key
+        _export_rows["rows"] = {}
+    cached_rows = _export_rows["rows"]
     
     # Create filename with date range
     date_suffix = f"_{from_date.strftime('%d%m%Y')}_to_{to_date.strftime('%d%m%Y')}"
     csv_file_with_dates = CSV_EXPORT_FILE.replace('.csv', f'{date_suffix}.csv')
     
-    # Write to CSV file
-    os.makedirs(os.path.dirname(csv_file_with_dates), exist_ok=True)
-    with open(csv_file_with_dates, 'w', newline='', encoding='utf-8') as csvfile:
-        fieldnames = ["username", "total_status_updates", "total_hours_worked", 
-                     "number_of_leaves", "late_status_hours", "total_submissions",
-                     "from_date", "to_date"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(csv_data)
+    fieldnames = ["username", "total_status_updates", "total_hours_worked", 
+                 "number_of_leaves", "late_status_hours", "total_submissions",
+                 "from_date", "to_date"]
     
+    # Recount only users who changed since the last export
+    rows = []
+    for user_id, user_info in data.items():
+        leaves = casual_data.get(user_id, {}).get("leaves", [])
+        # record_status_update stamps updated_at, and casual leaves are only ever appended
+        fingerprint = (user_info.get("username"), user_info.get("updated_at"), len(leaves))
+        cached = cached_rows.get(user_id)
+        if cached is None or cached[0] != fingerprint:
+            records = build_user_submission_records(user_info)
+            stats = count_user_statistics_from_records(records, leaves, from_date, to_date)
+            cached = (fingerprint, (
+                user_info.get("username", "Unknown"),
+                stats["total_status_updates"],
+                stats["total_hours_worked"],
+                stats["total_leaves"],
+                stats["late_status_hours"],
+                stats["total_submissions"],
+                from_date_str,
+                to_date_str
+            ))
+            cached_rows[user_id] = cached
+        rows.append(cached[1])
+    
+    return csv_file_with_dates, fieldnames, rows
+
+def export_to_csv(from_date=None, to_date=None):
+    """Export user data to CSV format with optional date range filtering."""
+    csv_file_with_dates, fieldnames, rows = build_export(from_date, to_date)
+    write_csv(csv_file_with_dates, fieldnames, rows)
     return csv_file_with_dates
 
-def count_user_statistics_for_range(user_id, from_date, to_date):
-    """Count statistics for a specific date range."""
-    data = load_user_data()
-    casual_data = load_casual_leave_history()
-    user_id_str = str(user_id)
-    
-    stats = {
-        "total_status_updates": 0,
-        "total_hours_worked": 0.0,
-        "total_leaves": 0,
-        "late_status_hours": 0.0,
-        "total_submissions": 0
-    }
-    
-    # Count status updates and hours within date range
-    if user_id_str in data:
-        submissions = data[user_id_str].get("submissions", {})
-        
-        for submission in submissions.values():
-            try:
-                sub_date = datetime.datetime.strptime(submission["date"], "%d-%m-%Y").date()
-                if from_date <= sub_date <= to_date:
-                    stats["total_status_updates"] += 1
-                    stats["total_submissions"] += 1
-                    stats["total_hours_worked"] += submission["hours"]
-                    
-                    if submission.get("is_late", False):
-                        stats["late_status_hours"] += submission["hours"]
-            except ValueError:
-                continue
-    
-    # Count casual leaves within date range
-    if user_id_str in casual_data:
-        leaves = casual_data[user_id_str].get("leaves", [])
-        for leave in leaves:
-            try:
-                leave_start = datetime.datetime.strptime(leave["start"], "%d-%m-%Y").date()
-                if from_date <= leave_start <= to_date:
-                    stats["total_leaves"] += 1
-            except ValueError:
-                continue
-    
-    return stats
+def schedule_export():
+    """
+    Refresh the activity CSV in the background, folding every submission made within
+    EXPORT_DELAY_SECONDS into a single export. Exports synchronously when no event loop is running.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        export_to_csv()
+        return
+
+    _export_writer["dirty"] = True
+    task = _export_writer["task"]
+    if task is None or task.done():
+        _export_writer["task"] = loop.create_task(_flush_export())
+
+async def _flush_export():
+    while _export_writer["dirty"]:
+        await asyncio.sleep(EXPORT_DELAY_SECONDS)
+        _export_writer["dirty"] = False
+        # Snapshot the rows on the loop, where submissions mutate the data; write them on a worker thread
+        try:
+            csv_file, fieldnames, rows = build_export()
+            await asyncio.to_thread(write_csv, csv_file, fieldnames, rows)
+        except Exception as e:
+            print(f"CSV export error: {e}")
+
+def build_leave_request_embed(title: str, mention: str, reason: str, date_range: str, mode: str = "") -> discord.Embed:
+    """The embed posted to the leave request channel for approvers to act on."""
+    description = f"**Submitted by:** {mention}\n**Reason:** {reason}"
+    if mode:
+        description += f"\n**Mode:** {mode}"
+    leave_embed = discord.Embed(title=title, color=LEAVE_REQUEST_COLOR, description=description)
+    leave_embed.add_field(name="Date Range", value=date_range, inline=False)
+    leave_embed.add_field(name="Status", value="Pending", inline=False)
+    return leave_embed
 
 async def handle_auto_approval(interaction: discord.Interaction, request_data: dict, date_range_str: str):
     """Handles the final steps for an auto-approved leave request."""
-    pending_requests = load_pending_requests()
-    
-    # Ensure pending_requests is a list
-    if not isinstance(pending_requests, list):
-        pending_requests = []
-    
-    pending_requests.append(request_data)
-    save_pending_requests(pending_requests)
+    append_pending_request(request_data)
 
-    leave_tracking_channel_id = 1415019014224089147
-    leave_tracking_channel = interaction.client.get_channel(leave_tracking_channel_id)
+    leave_tracking_channel = await get_channel_once(interaction.client, LEAVE_TRACKING_CHANNEL_ID)
     bot_mention = interaction.client.user.mention
+    # Acknowledge the member and post to the tracking channel concurrently
+    pending = [interaction.followup.send("Your leave request has been automatically approved.", ephemeral=True)]
     if leave_tracking_channel:
         auto_approved_message = f"""```Leave on ({date_range_str})
 Leave Type: {request_data.get("type").capitalize()}
 Reason: {request_data.get("reason", "N/A")}```from {interaction.user.mention} auto approved by {bot_mention}."""
-        await leave_tracking_channel.send(auto_approved_message)
-    return await interaction.followup.send("Your leave request has been automatically approved.", ephemeral=True)
+        pending.append(leave_tracking_channel.send(auto_approved_message))
+    await asyncio.gather(*pending)
 
 def is_core_member(user_roles):
     """Checks if a user has the Core Member role."""
-    for role in user_roles:
-        if "Core Member" == role.name:
-            return True
-    return False
+    return any(role.name == "Core Member" for role in user_roles)
+
+def has_core_member_role(member: discord.Member):
+    """Same as is_core_member(member.roles), but checks one cached role id instead of every role name."""
+    guild_id = member.guild.id
+    if guild_id not in _core_role_ids:
+        role = discord.utils.get(member.guild.roles, name="Core Member")
+        _core_role_ids[guild_id] = role.id if role is not None else None
+    role_id = _core_role_ids[guild_id]
+    return role_id is not None and member.get_role(role_id) is not None
+
+def invalidate_core_role_cache(guild_id: int):
+    """Forget the cached Core Member role id after the guild's roles change."""
+    _core_role_ids.pop(guild_id, None)
 
 def validate_date_format(date_str):
     """Enhanced date validation with proper format handling."""
@@ -294,28 +325,35 @@ def validate_date_format(date_str):
     
     date_str = date_str.strip()
     
-    # Check basic format with regex
-    if not re.match(r'^\d{2}-\d{2}-\d{4}$', date_str):
+    # Check basic format; the layout is fixed-width, so no regex is needed.
+    # isdecimal() also accepts non-ASCII digits, which the stored DD-MM-YYYY strings must not contain
+    if not (len(date_str) == 10 and date_str.isascii() and date_str[2] == "-" and date_str[5] == "-"
+            and date_str[:2].isdecimal() and date_str[3:5].isdecimal() and date_str[6:].isdecimal()):
         raise ValueError("Date must be in DD-MM-YYYY format (e.g., 14-09-2025).")
     
     try:
-        date_obj = datetime.datetime.strptime(date_str, "%d-%m-%Y").date()
+        date_obj = datetime.date(int(date_str[6:]), int(date_str[3:5]), int(date_str[:2]))
     except ValueError:
         raise ValueError("Invalid date. Please check day/month values are correct.")
     
     return date_obj
 
-def validate_status_date(date_str):
-    """Validate date for status updates - allows past dates, not future dates."""
+def validate_status_date(date_str, today=None):
+    """
+    Validate date for status updates - allows past dates, not future dates.
+    Pass today when validating several things for one interaction to read the clock once.
+    """
     date_obj = validate_date_format(date_str)
     
-    if date_obj > datetime.date.today():
+    if today is None:
+        today = datetime.date.today()
+    if date_obj > today:
         raise ValueError("Date cannot be in the future.")
     
     # Allow backdated submissions (past dates are OK)
     return date_obj
 
-def validate_leave_date_range(date_range_str):
+def validate_leave_date_range(date_range_str, today=None):
     """Validate date range for leave requests - start date cannot be in past."""
     if not date_range_str or " to " not in date_range_str:
         raise ValueError("Date range must be in format 'DD-MM-YYYY to DD-MM-YYYY'.")
@@ -335,7 +373,9 @@ def validate_leave_date_range(date_range_str):
     if start_date > end_date:
         raise ValueError("Start date cannot be after end date.")
     
-    if start_date < datetime.date.today():
+    if today is None:
+        today = datetime.date.today()
+    if start_date < today:
         raise ValueError("Leave start date cannot be in the past.")
     
     return start_date, end_date, start_str, end_str
@@ -349,6 +389,8 @@ def validate_hours(hours_str, is_wfh=False, is_weekend=False):
         hours = float(hours_str)
     except ValueError:
         raise ValueError("Hours must be a valid number (e.g., 8, 8.5, 6.25).")
+    if not math.isfinite(hours):
+        raise ValueError("Hours must be a valid number (e.g., 8, 8.5, 6.25).")
     
     if hours < 0:
         raise ValueError("Hours cannot be negative.")
@@ -383,27 +425,25 @@ def validate_work_description(description):
     if len(description) > 5000:
         raise ValueError("Work description cannot exceed 5000 characters.")
 
-    # Check for meaningful content
-    unique_chars = len(set(description.replace(' ', '').lower()))
-    if unique_chars < 3:
+    # Check for meaningful content: at least 3 distinct characters, ignoring spaces and case.
+    # Normal text gets there within a few characters, so stop scanning as soon as it does.
+    seen = set()
+    for char in description:
+        if char != ' ':
+            seen.add(char.lower())
+            if len(seen) >= 3:
+                break
+    else:
         raise ValueError("Work description must contain meaningful content.")
     
     return description
 
 def validate_user_roles(user_roles):
     """Validate user has required team and year roles."""
-    from ..core.channel_lookup import TEAM_CATEGORY_MAP, YEAR_CHANNEL_PREFIX_MAP
-    
-    team_role = None
-    year_role = None
-    
     role_names = {role.name for role in user_roles}
     
-    for role_name in role_names:
-        if role_name in TEAM_CATEGORY_MAP:
-            team_role = role_name
-        if role_name in YEAR_CHANNEL_PREFIX_MAP:
-            year_role = role_name
+    team_role = next(iter(role_names & TEAM_CATEGORY_MAP.keys()), None)
+    year_role = next(iter(role_names & YEAR_CHANNEL_PREFIX_MAP.keys()), None)
     
     if not team_role:
         raise ValueError("You must have a team role (RedTeam, Android, BlockChain, Mobile) to use this bot.")
@@ -413,9 +453,11 @@ def validate_user_roles(user_roles):
     
     return team_role, year_role
 
-def is_late_submission(submission_date):
+def is_late_submission(submission_date, today=None):
     """Check if submission is backdated (late)."""
-    return submission_date < datetime.date.today()
+    if today is None:
+        today = datetime.date.today()
+    return submission_date < today
 
 class StatusForm(discord.ui.Modal, title="Daily Status Update"):
     def __init__(self, wfh_option: str):
@@ -473,10 +515,11 @@ class StatusForm(discord.ui.Modal, title="Daily Status Update"):
             validate_user_roles(interaction.user.roles)
             
             # 2. Validate date - allows past dates for backdated submissions
-            submission_date = validate_status_date(self.date_input.value)
+            today = datetime.date.today()
+            submission_date = validate_status_date(self.date_input.value, today=today)
             
             # 3. Check if this is a late submission
-            is_late = is_late_submission(submission_date)
+            is_late = is_late_submission(submission_date, today=today)
             
             # 4. Validate WFH input
             wfh_option = self.wfh_input.value.lower().strip()
@@ -561,11 +604,8 @@ Time Spent: {hours_worked} hrs```By {interaction.user.mention}."""
         await interaction.response.send_message(f"Your status has been accepted and will be posted publicly.{weekly_note}", ephemeral=True)
         await target_channel.send(status_message)
 
-        # 14. Export updated CSV
-        try:
-            export_to_csv()
-        except Exception as e:
-            print(f"CSV export error: {e}")
+        # 14. Export updated CSV in the background
+        schedule_export()
 
 
 #everything is update here is the proof 
@@ -625,27 +665,24 @@ class CasualLeaveModal(discord.ui.Modal, title="Casual Leave Request"):
         # 6. Record leave as auto-approved
         record_casual_leave(interaction.user.id, start_date_str, end_date_str, requested_days)
 
-        # 7. Post to leave-tracking channel
+        # 7. Confirm to the member and post to leave-tracking channel concurrently
+        pending = [interaction.followup.send(
+            f"Your casual leave has been auto-approved for {requested_days} day(s).",
+            ephemeral=True
+        )]
         bot_mention = interaction.client.user.mention
-        leave_tracking_channel = interaction.client.get_channel(1415019014224089147)
+        leave_tracking_channel = await get_channel_once(interaction.client, LEAVE_TRACKING_CHANNEL_ID)
         if leave_tracking_channel:
-            await leave_tracking_channel.send(
+            pending.append(leave_tracking_channel.send(
                 f"""```Leave on ({self.date_range.value})
 Leave Type: Casual leave
 Reason: {reason}```
 from {interaction.user.mention} Approved by {bot_mention}"""
-            )
-
-        await interaction.followup.send(
-            f"Your casual leave has been auto-approved for {requested_days} day(s).",
-            ephemeral=True
-        )
+            ))
+        await asyncio.gather(*pending)
 
-        # Export updated CSV
-        try:
-            export_to_csv()
-        except Exception as e:
-            print(f"CSV export error: {e}")
+        # Export updated CSV in the background
+        schedule_export()
 
 
 class MedicalLeaveModal(discord.ui.Modal, title="Medical Leave Request"):
@@ -698,22 +735,10 @@ class MedicalLeaveModal(discord.ui.Modal, title="Medical Leave Request"):
             await interaction.followup.send(f"Validation Error: {str(e)}", ephemeral=True)
             return
 
+        # Build the whole payload up front; everything below is I/O
         request_id = str(uuid.uuid4())
-        
-        if is_core_member(interaction.user.roles):
-            request_data = {
-                "request_id": request_id,
-                "type": "medical",
-                "member_id": interaction.user.id,
-                "dates": {"start": start_date_str, "end": end_date_str},
-                "reason": reason,
-                "mode": mode,
-                "status": "auto-approved",
-                "created_at": datetime.datetime.now().isoformat()
-            }
-            return await handle_auto_approval(interaction, request_data, self.date_range.value)
-
-        status = "pending"
+        created_at = datetime.datetime.now()
+        auto_approved = has_core_member_role(interaction.user)
         request_data = {
             "request_id": request_id,
             "type": "medical",
@@ -721,32 +746,35 @@ class MedicalLeaveModal(discord.ui.Modal, title="Medical Leave Request"):
             "dates": {"start": start_date_str, "end": end_date_str},
             "reason": reason,
             "mode": mode,
-            "status": status,
-            "created_at": datetime.datetime.now().isoformat()
+            "status": STATUS_AUTO_APPROVED if auto_approved else STATUS_PENDING,
+            "created_at": created_at.isoformat(),
+            "created_ts": created_at.timestamp()
         }
-        pending_requests = load_pending_requests()
-        
-        # Ensure pending_requests is a list
-        if not isinstance(pending_requests, list):
-            pending_requests = []
-            
-        pending_requests.append(request_data)
-        save_pending_requests(pending_requests)
 
-        leave_embed = discord.Embed(
-            title="New Medical Leave Request",
-            color=discord.Color.gold(),
-            description=f"**Submitted by:** {interaction.user.mention}\n**Reason:** {reason}\n**Mode:** {mode}"
-        )
-        leave_embed.add_field(name="Date Range", value=self.date_range.value, inline=False)
-        leave_embed.add_field(name="Status", value="Pending", inline=False)
+        if auto_approved:
+            return await handle_auto_approval(interaction, request_data, self.date_range.value)
 
-        leave_request_channel_id = 1416718401044349038
-        leave_request_channel = interaction.client.get_channel(leave_request_channel_id)
-        if leave_request_channel:
-            await leave_request_channel.send(f"A new leave request is waiting!", embed=leave_embed, view=LeaveApprovalView(request_id=request_id))
+        # Without the request channel no one could approve the request, so don't queue it
+        leave_request_channel = await get_channel_once(interaction.client, LEAVE_REQUEST_CHANNEL_ID)
+        if leave_request_channel is None:
+            await interaction.followup.send(LEAVE_CHANNEL_MISSING_MESSAGE, ephemeral=True)
+            return
+
+        append_pending_request(request_data)
 
-        await interaction.followup.send("Your medical leave request has been submitted for review.", ephemeral=True)
+        leave_embed = build_leave_request_embed(
+            "New Medical Leave Request",
+            interaction.user.mention,
+            reason,
+            self.date_range.value,
+            mode=mode
+        )
+
+        # Confirm to the member and post the request for approvers concurrently
+        await asyncio.gather(
+            interaction.followup.send("Your medical leave request has been submitted for review.", ephemeral=True),
+            leave_request_channel.send(f"A new leave request is waiting!", embed=leave_embed, view=LeaveApprovalView(request_id=request_id))
+        )
 
 
 ### SpecialLeaveModal  ###
@@ -798,41 +826,41 @@ class SpecialLeaveModal(discord.ui.Modal, title="Special Leave Request"):
             await interaction.followup.send(f"Validation Error: {str(e)}", ephemeral=True)
             return
 
+        # Build the whole payload up front; everything below is I/O
         request_id = str(uuid.uuid4())
+        created_at = datetime.datetime.now()
+        auto_approved = has_core_member_role(interaction.user)
         request_data = {
             "request_id": request_id,
             "type": "special",
             "member_id": interaction.user.id,
             "dates": {"start": start_date_str, "end": end_date_str},
             "reason": reason,
-            "status": "pending",
-            "created_at": datetime.datetime.now().isoformat()
+            "status": STATUS_AUTO_APPROVED if auto_approved else STATUS_PENDING,
+            "created_at": created_at.isoformat(),
+            "created_ts": created_at.timestamp()
         }
 
-        if is_core_member(interaction.user.roles):
-            request_data["status"] = "auto-approved"
+        if auto_approved:
             return await handle_auto_approval(interaction, request_data, self.date_range.value)
 
-        pending_requests = load_pending_requests()
-        
-        # Ensure pending_requests is a list
-        if not isinstance(pending_requests, list):
-            pending_requests = []
-            
-        pending_requests.append(request_data)
-        save_pending_requests(pending_requests)
+        # Without the request channel no one could approve the request, so don't queue it
+        leave_request_channel = await get_channel_once(interaction.client, LEAVE_REQUEST_CHANNEL_ID)
+        if leave_request_channel is None:
+            await interaction.followup.send(LEAVE_CHANNEL_MISSING_MESSAGE, ephemeral=True)
+            return
+
+        append_pending_request(request_data)
         
-        leave_embed = discord.Embed(
-            title="New Special Leave Request",
-            color=discord.Color.gold(),
-            description=f"**Submitted by:** {interaction.user.mention}\n**Reason:** {reason}"
+        leave_embed = build_leave_request_embed(
+            "New Special Leave Request",
+            interaction.user.mention,
+            reason,
+            self.date_range.value
         )
-        leave_embed.add_field(name="Date Range", value=self.date_range.value, inline=False)
-        leave_embed.add_field(name="Status", value="Pending", inline=False)
-
-        leave_request_channel_id = 1416718401044349038
-        leave_request_channel = interaction.client.get_channel(leave_request_channel_id)
-        if leave_request_channel:
-            await leave_request_channel.send(embed=leave_embed, view=LeaveApprovalView(request_id=request_id))
 
-        await interaction.followup.send("Your special leave request has been submitted for review.", ephemeral=True)
\ No newline at end of file
+        # Confirm to the member and post the request for approvers concurrently
+        await asyncio.gather(
+            interaction.followup.send("Your special leave request has been submitted for review.", ephemeral=True),
+            leave_request_channel.send(embed=leave_embed, view=LeaveApprovalView(request_id=request_id))
+        )
\ No newline at end of file